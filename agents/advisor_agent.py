@@ -1,9 +1,10 @@
 # agents/advisor_agent.py
 
 import json
-from typing import List
+from typing import List, Optional, Union
 from .base_agent import BaseAgent, Message
-from services.llm_client import LLMClient
+from services.llm_client import AsyncLLMClient, LLMClient
+from services.llm_policy import LLMError
 from prompts.advisor_prompts import (
     ADVISOR_SYSTEM_PROMPT,
     CLIENT_TO_ADVISOR_PROMPT,
@@ -12,7 +13,11 @@ from prompts.advisor_prompts import (
 
 
 class AdvisorAgent(BaseAgent):
-    def __init__(self, llm: LLMClient):
+    def __init__(self, llm: Union[LLMClient, AsyncLLMClient]):
+        """
+        `llm` may be any client with `chat` (used by `handle`) and / or
+        `achat` (used by `ahandle`); an AsyncLLMClient requires `ahandle`.
+        """
         super().__init__(name="advisor")
         self.llm = llm
         self.waiting_for_analysis = False
@@ -21,33 +26,62 @@ class AdvisorAgent(BaseAgent):
     # ---------------------------------------------------------------
     def handle(self, message: Message) -> List[Message]:
         if message.sender == "client":
-            return self._handle_client_message(message)
+            return self._client_reply(message, self._chat(self._client_prompt(message)))
         elif message.sender == "analyst":
-            return self._handle_analyst_message(message)
+            return self._analyst_reply(self._chat(self._analyst_prompt(message)))
         else:
             self.log(f"Unknown sender: {message.sender}")
             return []
 
+    async def ahandle(self, message: Message) -> List[Message]:
+        """
+        Same as `handle`, awaiting the LLM instead of blocking a thread.
+        """
+        if message.sender == "client":
+            return self._client_reply(message, await self._achat(self._client_prompt(message)))
+        elif message.sender == "analyst":
+            return self._analyst_reply(await self._achat(self._analyst_prompt(message)))
+        else:
+            self.log(f"Unknown sender: {message.sender}")
+            return []
+
+    # ---------------------------------------------------------------
+    def _chat(self, prompt: str) -> Optional[str]:
+        """
+        LLM reply, or None if the LLM call failed (the caller falls back).
+        """
+        try:
+            return self.llm.chat(prompt, system_prompt=ADVISOR_SYSTEM_PROMPT)
+        except LLMError as e:
+            self.log(f"LLM call failed ({type(e).__name__}: {e})")
+            return None
+
+    async def _achat(self, prompt: str) -> Optional[str]:
+        try:
+            return await self.llm.achat(prompt, system_prompt=ADVISOR_SYSTEM_PROMPT)
+        except LLMError as e:
+            self.log(f"LLM call failed ({type(e).__name__}: {e})")
+            return None
+
     # ---------------------------------------------------------------
-    def _handle_client_message(self, message: Message) -> List[Message]:
+    def _client_prompt(self, message: Message) -> str:
         profile = message.metadata.get("client_profile", {})
         self.last_client_profile = profile
         risk = profile.get("risk", "moderate")
         goal = profile.get("goal", "general")
 
         # Build user prompt for LLM
-        user_prompt = CLIENT_TO_ADVISOR_PROMPT.format(
+        return CLIENT_TO_ADVISOR_PROMPT.format(
             goal=goal, risk=risk, message=message.content
         )
 
-        # Call LLM
-        raw_output = self.llm.chat(user_prompt, system_prompt=ADVISOR_SYSTEM_PROMPT)
+    def _client_reply(self, message: Message, raw_output: Optional[str]) -> List[Message]:
         self.log(f"LLM raw output: {raw_output}")
 
-        # Parse JSON safely
+        # Parse JSON safely (raw_output is None if the LLM call failed)
         try:
             parsed = json.loads(raw_output)
-        except json.JSONDecodeError:
+        except (TypeError, json.JSONDecodeError):
             self.log(" JSON parsing failed — returning fallback message.")
             parsed = {"tasks_for_analyst": ["Find moderate risk ETFs"], "recommendation": "pending"}
 
@@ -56,30 +90,30 @@ class AdvisorAgent(BaseAgent):
             sender="advisor",
             receiver="analyst",
             content="; ".join(tasks),
-            metadata={"client_profile": profile},
+            metadata={"client_profile": message.metadata.get("client_profile", {})},
         )
 
         print(f"[Advisor → Analyst]: {msg_to_analyst.content}")
         return [msg_to_analyst]
 
     # ---------------------------------------------------------------
-    def _handle_analyst_message(self, message: Message) -> List[Message]:
+    def _analyst_prompt(self, message: Message) -> str:
         results = message.metadata.get("results", [])
         analyst_json = json.dumps(results, indent=2)
 
         risk = self.last_client_profile.get("risk", "moderate")
         goal = self.last_client_profile.get("goal", "general")
 
-        user_prompt = ANALYST_TO_ADVISOR_PROMPT.format(
+        return ANALYST_TO_ADVISOR_PROMPT.format(
             analyst_data=analyst_json, goal=goal, risk=risk
         )
 
-        raw_output = self.llm.chat(user_prompt, system_prompt=ADVISOR_SYSTEM_PROMPT)
+    def _analyst_reply(self, raw_output: Optional[str]) -> List[Message]:
         self.log(f"LLM raw output: {raw_output}")
 
         try:
             parsed = json.loads(raw_output)
-        except json.JSONDecodeError:
+        except (TypeError, json.JSONDecodeError):
             self.log(" JSON parse error — using fallback recommendation.")
             parsed = {"recommendation": "VTI and AGG", "summary": "Balanced portfolio suggestion."}
 
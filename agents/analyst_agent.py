@@ -6,22 +6,54 @@ AnalystAgent (RAG-enabled)
 Acts as the research arm of the Private Bank.
 Uses VectorStore (FAISS + SentenceTransformer) for semantic retrieval.
 - Receives research tasks from AdvisorAgent.
-- Searches semantic index for relevant investment instruments.
+- Searches semantic index for relevant investment instruments
+  (profile queries for known (risk, goal) pairs are precomputed).
+- Optionally re-ranks a larger candidate pool with a cross-encoder.
 - Returns factual results in structured format.
 """
 
-from typing import List
+from typing import List, Optional
 from agents.base_agent import BaseAgent
 from models.message import Message
 from services.vector_store import VectorStore
+from services.reranker import CrossEncoderReranker
+from services.profile_grid import (
+    PROFILE_MIN_SCORE,
+    PROFILE_MMR_LAMBDA,
+    PROFILE_TOP_K,
+    analyst_profile_table,
+    profile_query,
+)
 from services.tools import log_event, timeit
 
 
 class AnalystAgent(BaseAgent):
-    def __init__(self, knowledge_path: str = "knowledge/corpus.json"):
+    # Cosine similarity below which a retrieved instrument is treated as irrelevant
+    MIN_RELEVANCE = PROFILE_MIN_SCORE
+    TOP_K = PROFILE_TOP_K
+    # MMR trade-off: picks TOP_K diverse instruments from a larger candidate pool
+    MMR_LAMBDA = PROFILE_MMR_LAMBDA
+
+    def __init__(
+        self,
+        knowledge_path: str = "knowledge/corpus.json",
+        vector_store: Optional[VectorStore] = None,
+        reranker: Optional[CrossEncoderReranker] = None,
+    ):
+        """
+        Pass a shared `vector_store` (see services.store_registry) to avoid
+        loading the embedding model and re-indexing the corpus per agent.
+        With a `reranker`, RERANK_CANDIDATES hits are retrieved per query and
+        re-scored by the cross-encoder instead of being diversified by MMR.
+        """
         super().__init__(name="analyst")
         log_event("AnalystAgent", "Initializing RAG-based analyst agent...")
-        self.vector_store = VectorStore(knowledge_path)
+        self.vector_store = vector_store if vector_store is not None else VectorStore(knowledge_path, lexical=True)
+        self.reranker = reranker
+        # Live searches use the same settings as the (shared, prebuilt) profile table
+        self.profile_results = analyst_profile_table(self.vector_store, reranking=reranker is not None)
+        self.retrieval_depth = self.profile_results.top_k
+        self.retrieval_mmr = self.profile_results.mmr_lambda
 
     # ----------------------------------------------------------
     @timeit
@@ -41,16 +73,33 @@ class AnalystAgent(BaseAgent):
 
         log_event("AnalystAgent", f"Received research query: '{query_text}' for goal={goal}, risk={risk}")
 
-        # Step 1️ - Semantic search
-        results = self.vector_store.search(
-            f"{risk} risk investment options for {goal}",
-            top_k=3
-        )
+        # Step 1️ - Hybrid search (profile query + one query per advisor task, one batch),
+        #           restricted to instruments matching the client's risk level.
+        #           Known (risk, goal) profiles come from the precomputed table.
+        tasks = [t.strip() for t in message.content.split(";") if t.strip()]
+        profile_results = self.profile_results.get(risk, goal)
+        queries = tasks if profile_results is not None else [profile_query(risk, goal)] + tasks
+        result_lists = self.vector_store.search_batch(
+            queries,
+            top_k=self.retrieval_depth,
+            filters={"risk_level": risk},
+            min_score=self.MIN_RELEVANCE,
+            hybrid=True,
+            mmr_lambda=self.retrieval_mmr,
+        ) if queries else []
+        if profile_results is not None:
+            queries = [profile_query(risk, goal)] + queries
+            result_lists = [profile_results] + result_lists
+
+        # Step 1b - Optional cross-encoder re-ranking of the candidate pools
+        if self.reranker is not None:
+            result_lists = self.reranker.rerank_batch(queries, result_lists, top_k=self.TOP_K)
+        results = self._merge_results(result_lists, limit=self.TOP_K)
 
         # Step 2️ - Handle empty result fallback
         if not results:
             log_event("AnalystAgent", "⚠️ No relevant results found. Returning fallback instruments.")
-            results = self.vector_store.corpus[:2]
+            results = self.vector_store.first_documents(2)
 
         # Step 3️ - Create human-readable summary
         summary = ", ".join([r["name"] for r in results])
@@ -66,3 +115,17 @@ class AnalystAgent(BaseAgent):
 
         log_event("AnalystAgent", f"Returning analysis results: {summary}")
         return [msg_back]
+
+    # ----------------------------------------------------------
+    @staticmethod
+    def _merge_results(result_lists: List[List[dict]], limit: int) -> List[dict]:
+        """
+        Interleave per-query results by rank, dropping duplicate instruments.
+        """
+        merged, seen = [], set()
+        for rank in range(max((len(r) for r in result_lists), default=0)):
+            for results in result_lists:
+                if rank < len(results) and results[rank]["name"] not in seen:
+                    seen.add(results[rank]["name"])
+                    merged.append(results[rank])
+        return merged[:limit]
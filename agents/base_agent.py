@@ -8,6 +8,7 @@ This file defines:
 2. The BaseAgent abstract class (interface every agent must follow)
 """
 
+import asyncio
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import Dict, Any, Literal, List
@@ -51,6 +52,13 @@ class BaseAgent(ABC):
         """
         pass
 
+    async def ahandle(self, message: Message) -> List[Message]:
+        """
+        Async variant of `handle` for event-loop servers. The default runs
+        `handle` on a worker thread; agents that wait on I/O override it.
+        """
+        return await asyncio.to_thread(self.handle, message)
+
     # Optional: a helper function for logging or debugging
     def log(self, text: str):
         print(f"[{self.name.upper()} LOG]: {text}")
@@ -4,18 +4,69 @@ FastAPI layer for the Agentic Private Bank multi-agent system.
 Endpoints:
   - /simulate : run a full client–advisor–analyst conversation.
   - /recommend : run a single query with a custom client profile.
+  - /ready : readiness probe; 503 until the vector store and model are warm.
+  - /admin/reload : rebuild the index from the corpus file and hot-swap it
+                    (disabled unless ADMIN_TOKEN is set; send it as X-Admin-Token).
+Set RERANKER_MODEL (a locally cached cross-encoder) to re-rank analyst results.
+Set INDEX_RELOAD_INTERVAL (seconds) to have every worker pick up corpus changes.
+Set SHARED_INDEX=1 to memory-map the index so all workers share one copy.
+Set LLM_MODEL to use the OpenAI API (async, pooled) instead of the mock LLM;
+LLM_MAX_CONCURRENCY caps in-flight LLM requests per worker, LLM_TIMEOUT (seconds)
+bounds each LLM attempt and LLM_DEADLINE each call including retries.
+LLM responses are cached in memory; LLM_CACHE_PATH adds a SQLite file shared by
+all workers, LLM_SEMANTIC_CACHE_THRESHOLD (e.g. 0.97) reuses near-duplicate answers.
 """
 
-from fastapi import FastAPI
+import asyncio
+import hmac
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from agents.client_agent import ClientAgent
 from agents.advisor_agent import AdvisorAgent
 from agents.analyst_agent import AnalystAgent
 from models.client_profile import ClientProfile
 from models.message import Message
-from services.llm_client import DummyLLM
+from services.llm_cache import DEFAULT_SEMANTIC_THRESHOLD, CachedLLMClient
+from services.llm_client import DEFAULT_MAX_CONCURRENCY, AsyncLLMClient, DummyLLM
+from services.llm_policy import LLMPolicy
+from services.reranker import CrossEncoderReranker
+from services.store_registry import VectorStoreRegistry
+from services.vector_store import VectorStore
+
+# ---------- Lifecycle ----------
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build the shared vector store once per worker and reuse it for every request."""
+    reranker_model = os.getenv("RERANKER_MODEL")
+    registry = VectorStoreRegistry(shared_index=os.getenv("SHARED_INDEX") == "1", reranker_model=reranker_model)
+    registry.start_warm_up()  # load the default corpus + embedding model in the background
+    app.state.vector_stores = registry
+    app.state.reranker = registry.get_reranker() if reranker_model else None
+    reload_interval = os.getenv("INDEX_RELOAD_INTERVAL")
+    if reload_interval:
+        registry.start_auto_reload(float(reload_interval))
+    llm_model = os.getenv("LLM_MODEL")
+    max_concurrency = int(os.getenv("LLM_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY))
+    llm_policy = LLMPolicy(
+        timeout=float(os.getenv("LLM_TIMEOUT", LLMPolicy.timeout)),
+        deadline=float(os.getenv("LLM_DEADLINE", LLMPolicy.deadline)),
+    )
+    semantic_threshold = os.getenv("LLM_SEMANTIC_CACHE_THRESHOLD")
+    app.state.llm = CachedLLMClient(
+        AsyncLLMClient(llm_model, max_concurrency, llm_policy) if llm_model else DummyLLM(),
+        sqlite_path=os.getenv("LLM_CACHE_PATH"),
+        semantic_model_loader=registry.get_model if semantic_threshold else None,  # the retrieval model
+        semantic_threshold=float(semantic_threshold or DEFAULT_SEMANTIC_THRESHOLD),
+    )
+    yield
+    await app.state.llm.aclose()
+    registry.clear()
 
-app = FastAPI(title="Agentic Private Bank API", version="1.0")
+app = FastAPI(title="Agentic Private Bank API", version="1.0", lifespan=lifespan)
 
 # ---------- Data Models ----------
 
@@ -33,10 +84,15 @@ class RecommendRequest(BaseModel):
 
 # ---------- Helper ----------
 
-def run_simulation(profile: ClientProfile, query: str = "I want to invest for retirement.") -> ConversationResult:
-    llm = DummyLLM()
-    advisor = AdvisorAgent(llm=llm)
-    analyst = AnalystAgent()
+async def run_simulation(
+    profile: ClientProfile,
+    query: str = "I want to invest for retirement.",
+    vector_store: VectorStore | None = None,
+    reranker: CrossEncoderReranker | None = None,
+    llm: CachedLLMClient | AsyncLLMClient | DummyLLM | None = None,
+) -> ConversationResult:
+    advisor = AdvisorAgent(llm=llm if llm is not None else DummyLLM())
+    analyst = AnalystAgent(vector_store=vector_store, reranker=reranker)
     client = ClientAgent(profile=profile)
 
     transcript: list[str] = []
@@ -47,9 +103,9 @@ def run_simulation(profile: ClientProfile, query: str = "I want to invest for re
         transcript.append(f"{msg.sender} → {msg.receiver}: {msg.content}")
 
         if msg.receiver == "advisor":
-            new_msgs = advisor.handle(msg)
+            new_msgs = await advisor.ahandle(msg)  # awaits the LLM without holding a thread
         elif msg.receiver == "analyst":
-            new_msgs = analyst.handle(msg)
+            new_msgs = await analyst.ahandle(msg)  # CPU-bound search runs on a worker thread
         elif msg.receiver == "client":
             new_msgs = client.handle(msg)
         else:
@@ -69,15 +125,41 @@ def run_simulation(profile: ClientProfile, query: str = "I want to invest for re
 def root():
     return {"message": "Agentic Private Bank API is running."}
 
+@app.get("/ready")
+def ready(request: Request):
+    """Readiness probe: only report ready once the embedding model is resident."""
+    registry = request.app.state.vector_stores
+    if registry.ready.is_set():
+        return {"status": "ready"}
+    if registry.warm_up_error is not None:
+        return JSONResponse(status_code=503, content={"status": "error", "detail": str(registry.warm_up_error)})
+    return JSONResponse(status_code=503, content={"status": "warming_up"})
+
+def require_admin(token: str | None):
+    """Reject the request unless ADMIN_TOKEN is configured and `token` matches it."""
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled.")
+    if token is None or not hmac.compare_digest(token.encode(), expected.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
+@app.post("/admin/reload")
+def reload_index(request: Request, force: bool = False, x_admin_token: str | None = Header(default=None)):
+    """Rebuild the default store if its corpus changed (or `force`) and hot-swap it in this worker."""
+    require_admin(x_admin_token)
+    return request.app.state.vector_stores.reload(force=force)
+
 @app.post("/simulate", response_model=ConversationResult)
-def simulate():
+async def simulate(request: Request):
     """Run default simulation with preset client profile."""
     profile = ClientProfile(name="Kavya", age=40, risk="moderate", goal="retirement", investment_amount=200000)
-    result = run_simulation(profile)
+    state = request.app.state
+    vector_store = await asyncio.to_thread(state.vector_stores.get)
+    result = await run_simulation(profile, vector_store=vector_store, reranker=state.reranker, llm=state.llm)
     return result
 
 @app.post("/recommend", response_model=ConversationResult)
-def recommend(req: RecommendRequest):
+async def recommend(req: RecommendRequest, request: Request):
     """Run simulation using custom client profile & query."""
     profile = ClientProfile(
         name=req.name,
@@ -86,5 +168,9 @@ def recommend(req: RecommendRequest):
         goal=req.goal,
         investment_amount=req.investment_amount,
     )
-    result = run_simulation(profile, query=req.query)
+    state = request.app.state
+    vector_store = await asyncio.to_thread(state.vector_stores.get)
+    result = await run_simulation(
+        profile, query=req.query, vector_store=vector_store, reranker=state.reranker, llm=state.llm
+    )
     return result
@@ -0,0 +1,283 @@
+# benchmarks/retrieval_benchmark.py
+"""
+Retrieval Benchmark
+-------------------
+Measures VectorStore.search quality and speed on synthetic corpora
+(see benchmarks.synthetic_corpus): recall@k, MRR@k, p50/p95/p99 latency,
+QPS and memory for every (corpus size, embedding backend, index config).
+
+Each index build runs in a fresh process, so build time and peak RSS are
+isolated per configuration; configs that only differ in search parameters
+(nprobe / ef_search, expanded with index_factory.sweep) share one build.
+Output is JSON with sorted keys and rounded numbers, to diff across commits.
+
+Usage:
+  python -m benchmarks.retrieval_benchmark --sizes 10000 100000 \\
+      --backends hashing onnx --indexes flat hnsw ivf_flat --storage float32 sq8 \\
+      --nprobe 8 32 --output benchmarks/results.json
+"""
+
+import argparse
+import json
+import math
+import multiprocessing as mp
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from typing import Any, Dict, List, Optional
+import numpy as np
+from benchmarks.synthetic_corpus import corpus_labels, doc_id_of, make_queries, write_corpus
+from services.embedding_backends import EMBEDDING_BACKENDS, EmbeddingConfig
+from services.index_factory import INDEX_KINDS, MIN_POINTS_PER_CENTROID, STORAGE_MODES, IndexConfig, sweep
+
+
+DEFAULT_SIZES = (10_000, 100_000)
+DEFAULT_QUERIES = 200
+DEFAULT_DATA_DIR = os.path.join("benchmarks", ".data")
+
+
+# -----------------------------------------------------
+def ensure_corpus(size: int, seed: int, data_dir: str = DEFAULT_DATA_DIR) -> str:
+    """
+    Path of the synthetic JSON Lines corpus for (size, seed), generated on first use.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"synthetic-{size}-{seed}.jsonl")
+    if not os.path.exists(path):
+        write_corpus(path + ".tmp.jsonl", size, seed)
+        os.replace(path + ".tmp.jsonl", path)
+    return path
+
+
+def index_configs(
+    kinds: List[str],
+    storage: List[str],
+    size: int,
+    nprobe: Optional[List[int]] = None,
+    ef_search: Optional[List[int]] = None,
+) -> List[IndexConfig]:
+    """
+    One config per (kind, storage), with IVF `nlist` scaled to the corpus
+    (about 4 * sqrt(n) cells) and nprobe / ef_search sweeps expanded.
+    Binary storage ignores the kind (it is always a flat Hamming index), so
+    it yields a single config.
+    """
+    nlist = max(1, min(int(4 * math.sqrt(size)), size // MIN_POINTS_PER_CENTROID))
+    configs = []
+    for kind in kinds:
+        for mode in storage:
+            config = IndexConfig(kind=kind, storage=mode, nlist=nlist)
+            if config.is_binary and any(c.is_binary for c in configs):
+                continue
+            if kind.startswith("ivf") and nprobe and not config.is_binary:
+                configs.extend(sweep(config, nprobe=nprobe))
+            elif kind == "hnsw" and ef_search and not config.is_binary:
+                configs.extend(sweep(config, ef_search=ef_search))
+            else:
+                configs.append(config)
+    return configs
+
+
+# -----------------------------------------------------
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def _percentile_ms(latencies: List[float], q: float) -> float:
+    return 1000.0 * float(np.percentile(latencies, q))
+
+
+def _run_build(
+    corpus_path: str,
+    size: int,
+    seed: int,
+    queries: List[Dict[str, Any]],
+    embedding: EmbeddingConfig,
+    configs: List[IndexConfig],
+    top_k: int,
+    hybrid: bool,
+) -> List[Dict[str, Any]]:
+    """
+    Worker process: build one store, then evaluate each config against it.
+    """
+    from services.vector_store import VectorStore
+
+    labels = corpus_labels(size, seed)
+    texts = [q["text"] for q in queries]
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):  # per-search logging would skew timings
+        rss_before = _rss_mb()
+        start = time.perf_counter()
+        store = VectorStore(
+            corpus_path, embedding=embedding, index_config=configs[0], query_cache_size=0, lexical=hybrid
+        )
+        build_s = time.perf_counter() - start
+        store.search(texts[0], top_k, hybrid=hybrid)  # load the model / touch the index before timing
+        rss_mb = _rss_mb() - rss_before
+
+        rows = []
+        for config in configs:
+            store.index_config = config  # same build; only search parameters differ
+            latencies, recall, reciprocal_rank = [], 0.0, 0.0
+            for query in queries:
+                start = time.perf_counter()
+                results = store.search(query["text"], top_k, hybrid=hybrid)
+                latencies.append(time.perf_counter() - start)
+                ranks = [
+                    rank for rank, r in enumerate(results, 1) if labels[doc_id_of(r["name"])] == query["combo"]
+                ]
+                recall += len(ranks) / min(top_k, query["relevant"])
+                reciprocal_rank += 1.0 / ranks[0] if ranks else 0.0
+
+            start = time.perf_counter()
+            store.search_batch(texts, top_k, hybrid=hybrid)
+            batch_s = time.perf_counter() - start
+
+            rows.append({
+                "index": config.build_key(),
+                "nprobe": config.nprobe if config.kind.startswith("ivf") and not config.is_binary else None,
+                "ef_search": config.ef_search if config.kind == "hnsw" and not config.is_binary else None,
+                f"recall@{top_k}": recall / len(queries),
+                f"mrr@{top_k}": reciprocal_rank / len(queries),
+                "latency_ms": {
+                    "p50": _percentile_ms(latencies, 50),
+                    "p95": _percentile_ms(latencies, 95),
+                    "p99": _percentile_ms(latencies, 99),
+                },
+                "qps": {"sequential": len(queries) / sum(latencies), "batch": len(queries) / batch_s},
+                "build_s": build_s,
+                "memory_mb": {"store_rss": rss_mb, "peak_rss": _peak_rss_mb()},
+            })
+    return rows
+
+
+# -----------------------------------------------------
+def _rounded(value: Any) -> Any:
+    if isinstance(value, float):
+        return round(value, 4)
+    if isinstance(value, dict):
+        return {k: _rounded(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_rounded(v) for v in value]
+    return value
+
+
+def _metadata(args: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import faiss
+
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "faiss": faiss.__version__,
+        "cpu_count": os.cpu_count(),
+        **args,
+    }
+
+
+def run_benchmark(
+    sizes: List[int] = DEFAULT_SIZES,
+    backends: List[str] = ("hashing",),
+    kinds: List[str] = ("flat", "hnsw", "ivf_flat"),
+    storage: List[str] = ("float32",),
+    nprobe: Optional[List[int]] = None,
+    ef_search: Optional[List[int]] = None,
+    num_queries: int = DEFAULT_QUERIES,
+    top_k: int = 10,
+    seed: int = 0,
+    hybrid: bool = False,
+    data_dir: str = DEFAULT_DATA_DIR,
+) -> Dict[str, Any]:
+    """
+    Run every (size, backend, index config) and return the report dict.
+    A configuration that fails (e.g. a backend whose packages are missing)
+    gets an `error` row instead of aborting the run.
+    """
+    results = []
+    for size in sizes:
+        corpus_path = ensure_corpus(size, seed, data_dir)
+        queries = make_queries(corpus_labels(size, seed), num_queries, seed)
+        builds: Dict[str, List[IndexConfig]] = {}
+        for config in index_configs(kinds, storage, size, nprobe, ef_search):
+            builds.setdefault(config.build_key(), []).append(config)
+
+        for backend in backends:
+            embedding = EmbeddingConfig(backend=backend)
+            for build_key, configs in builds.items():
+                print(f"[benchmark] n={size} backend={backend} index={build_key}", file=sys.stderr)
+                with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn")) as pool:
+                    job = pool.submit(
+                        _run_build, corpus_path, size, seed, queries, embedding, configs, top_k, hybrid
+                    )
+                    try:
+                        rows = job.result()
+                    except Exception as e:
+                        rows = [{"index": build_key, "error": f"{type(e).__name__}: {e}"}]
+                for row in rows:
+                    results.append({"corpus_size": size, "backend": embedding.key(), **row})
+
+    meta = _metadata({
+        "sizes": list(sizes),
+        "queries": num_queries,
+        "top_k": top_k,
+        "seed": seed,
+        "hybrid": hybrid,
+    })
+    return _rounded({"meta": meta, "results": results})
+
+
+# -----------------------------------------------------
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark VectorStore retrieval quality and latency.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--backends", nargs="+", choices=EMBEDDING_BACKENDS, default=["hashing"])
+    parser.add_argument("--indexes", nargs="+", choices=INDEX_KINDS, default=["flat", "hnsw", "ivf_flat"])
+    parser.add_argument("--storage", nargs="+", choices=STORAGE_MODES, default=["float32"])
+    parser.add_argument("--nprobe", type=int, nargs="+", help="IVF nprobe values to sweep")
+    parser.add_argument("--ef-search", type=int, nargs="+", help="HNSW ef_search values to sweep")
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--hybrid", action="store_true", help="benchmark hybrid (BM25 + vector) search")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--output", default="-", help="JSON report path ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(
+        sizes=args.sizes,
+        backends=args.backends,
+        kinds=args.indexes,
+        storage=args.storage,
+        nprobe=args.nprobe,
+        ef_search=args.ef_search,
+        num_queries=args.queries,
+        top_k=args.k,
+        seed=args.seed,
+        hybrid=args.hybrid,
+        data_dir=args.data_dir,
+    )
+    text = json.dumps(report, indent=2, sort_keys=True) + "\n"
+    if args.output == "-":
+        sys.stdout.write(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# benchmarks/synthetic_corpus.py
+"""
+Synthetic Corpus
+----------------
+Generates instrument corpora of any size in the knowledge/corpus.json schema
+(name, type, risk_level, description) plus a labelled query set for them.
+
+Every instrument is a combination of six attributes (asset class, sector,
+region, style, theme, fee level); the combination id is its relevance label.
+Queries describe one combination, mixing the wording used in descriptions
+with synonyms, so lexical overlap alone does not solve them. A document is
+relevant to a query when it has the same combination.
+
+Generation is deterministic for a given (size, seed) and streams to disk,
+so 5M-instrument corpora never have to fit in memory (use a .jsonl path).
+"""
+
+import json
+import random
+from typing import Any, Dict, List, Tuple
+import numpy as np
+
+
+# (description wording, query synonyms) per attribute value
+ASSET_CLASSES = [  # (type, wording, synonyms, base risk: 0 low .. 2 high)
+    ("ETF", "equity ETF", ["stock ETF", "exchange-traded equity fund"], 1),
+    ("Bond", "bond fund", ["fixed income fund", "debt fund"], 0),
+    ("Stock", "common stock", ["equity shares", "single stock"], 2),
+    ("Mutual Fund", "actively managed mutual fund", ["managed fund", "active fund"], 1),
+    ("REIT", "real estate investment trust", ["property trust", "real estate fund"], 1),
+    ("Commodity", "commodity ETF", ["commodities fund", "raw materials ETF"], 2),
+]
+SECTORS = [
+    ("technology", ["tech", "software and semiconductors"]),
+    ("healthcare", ["medical", "pharma and biotech"]),
+    ("financials", ["banking", "banks and insurers"]),
+    ("energy", ["oil and gas", "energy producers"]),
+    ("utilities", ["power companies", "electric and water utilities"]),
+    ("consumer staples", ["everyday goods", "food and household products"]),
+    ("industrials", ["manufacturing", "industrial companies"]),
+    ("materials", ["mining", "chemicals and metals"]),
+    ("communications", ["telecom", "media and telecom"]),
+    ("consumer discretionary", ["retail", "shopping and leisure"]),
+    ("infrastructure", ["roads and ports", "toll roads and pipelines"]),
+    ("broad market", ["total market", "whole market"]),
+]
+REGIONS = [
+    ("the US", ["American", "United States"]),
+    ("Europe", ["European", "the eurozone"]),
+    ("Japan", ["Japanese", "Tokyo-listed"]),
+    ("emerging markets", ["developing economies", "EM"]),
+    ("China", ["Chinese", "mainland China"]),
+    ("India", ["Indian", "the Indian subcontinent"]),
+    ("global markets", ["worldwide", "international"]),
+    ("the UK", ["British", "London-listed"]),
+]
+STYLES = [  # (wording, synonyms, risk adjustment)
+    ("growth", ["high-growth", "fast-growing"], 1),
+    ("value", ["undervalued", "cheap valuation"], 0),
+    ("dividend", ["income-paying", "high-yield dividend"], -1),
+    ("ESG", ["sustainable", "socially responsible"], 0),
+    ("small-cap", ["smaller companies", "small company"], 1),
+    ("low-volatility", ["defensive", "low-risk"], -1),
+]
+THEMES = [
+    ("long-term retirement savings", ["retirement", "saving for retirement"]),
+    ("education funding", ["college savings", "paying for university"]),
+    ("steady income", ["regular payouts", "monthly income"]),
+    ("capital preservation", ["protecting capital", "keeping money safe"]),
+    ("aggressive growth", ["maximum growth", "high returns"]),
+    ("inflation protection", ["hedging inflation", "beating inflation"]),
+    ("short-term cash needs", ["near-term spending", "parking cash"]),
+    ("estate planning", ["wealth transfer", "passing wealth to heirs"]),
+]
+FEES = [
+    ("low-cost", ["cheap", "low fee"]),
+    ("premium", ["high fee", "expensive"]),
+]
+RISK_LEVELS = ("low", "moderate", "high")
+
+_RADICES = (len(ASSET_CLASSES), len(SECTORS), len(REGIONS), len(STYLES), len(THEMES), len(FEES))
+NUM_COMBINATIONS = int(np.prod(_RADICES))
+
+
+# -----------------------------------------------------
+def corpus_labels(size: int, seed: int = 0) -> np.ndarray:
+    """
+    Combination id of every document (doc ID = position in the corpus).
+    """
+    return np.random.default_rng(seed).integers(0, NUM_COMBINATIONS, size=size, dtype=np.int64)
+
+
+def _attributes(combo: int) -> Tuple[int, ...]:
+    digits = []
+    for radix in reversed(_RADICES):
+        combo, digit = divmod(combo, radix)
+        digits.append(digit)
+    return tuple(reversed(digits))
+
+
+def doc_name(doc_id: int) -> str:
+    return f"SYN{doc_id:07d}"
+
+
+def doc_id_of(name: str) -> int:
+    return int(name[3:])
+
+
+def make_document(doc_id: int, combo: int) -> Dict[str, Any]:
+    """
+    The corpus entry for a document with this combination.
+    """
+    a, s, r, st, t, f = _attributes(combo)
+    asset_type, asset, _, base_risk = ASSET_CLASSES[a]
+    style, _, risk_adjustment = STYLES[st]
+    risk = RISK_LEVELS[min(2, max(0, base_risk + risk_adjustment))]
+    description = (
+        f"{FEES[f][0].capitalize()} {style} {SECTORS[s][0]} {asset} investing in {REGIONS[r][0]}, "
+        f"suited to {THEMES[t][0]}."
+    )
+    return {"name": doc_name(doc_id), "type": asset_type, "risk_level": risk, "description": description}
+
+
+# -----------------------------------------------------
+def write_corpus(path: str, size: int, seed: int = 0) -> np.ndarray:
+    """
+    Write a corpus of `size` instruments to `path` (JSON Lines if it ends in
+    .jsonl, else a JSON array) and return its relevance labels.
+    """
+    labels = corpus_labels(size, seed)
+    with open(path, "w", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for doc_id, combo in enumerate(labels.tolist()):
+                f.write(json.dumps(make_document(doc_id, combo)) + "\n")
+        else:
+            json.dump([make_document(doc_id, combo) for doc_id, combo in enumerate(labels.tolist())], f)
+    return labels
+
+
+def make_queries(labels: np.ndarray, count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    `count` labelled queries, each describing the combination of a randomly
+    chosen document; wording is picked per attribute from the description
+    term and its synonyms. Returns {"text", "combo", "relevant"} dicts, where
+    `relevant` is the number of documents with that combination.
+    """
+    rng = random.Random(seed)
+    counts = np.bincount(labels, minlength=NUM_COMBINATIONS)
+
+    def pick(term: str, synonyms: List[str]) -> str:
+        return rng.choice([term] + synonyms)
+
+    queries = []
+    for _ in range(count):
+        combo = int(labels[rng.randrange(len(labels))])
+        a, s, r, st, t, f = _attributes(combo)
+        asset = pick(ASSET_CLASSES[a][1], ASSET_CLASSES[a][2])
+        sector = pick(*SECTORS[s])
+        region = pick(*REGIONS[r])
+        style = pick(STYLES[st][0], STYLES[st][1])
+        theme = pick(*THEMES[t])
+        fee = pick(*FEES[f])
+        text = rng.choice([
+            f"{fee} {style} {sector} {asset} in {region} for {theme}",
+            f"{style} {asset} focused on {sector} in {region}, {fee}, good for {theme}",
+            f"I want {theme}: a {fee} {style} {region} {sector} {asset}",
+        ])
+        queries.append({"text": text, "combo": combo, "relevant": int(counts[combo])})
+    return queries
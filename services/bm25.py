@@ -0,0 +1,156 @@
+# services/bm25.py
+"""
+BM25 Lexical Index
+------------------
+In-memory inverted index with Okapi BM25 scoring over instrument
+`name` + `description`, built only for stores that run hybrid search
+(VectorStore(lexical=True)). Complements the embedding search in VectorStore:
+tickers and ISINs ("VTI", "ESGU", "US9229087690") are exact tokens here,
+whereas a sentence-embedding model barely distinguishes them.
+"""
+
+import math
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_TF_BITS = 16  # low bits of a postings entry hold the term frequency
+_TF_MASK = (1 << _TF_BITS) - 1
+# Function words carry no relevance signal; matching on them alone ("for",
+# "with") would pull unrelated instruments into hybrid results.
+STOPWORDS = frozenset("""
+    a an and are as at be by for from has have in into is it its of on or over so
+    such that the their this to was were what when which who will with
+    i me my we our you your he she they them do does can could would should
+    want need looking some any""".split())
+
+
+# -----------------------------------------------------
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def index_terms(text: str) -> List[str]:
+    """
+    Tokens of `text` that BM25 indexes and matches (stopwords removed).
+    """
+    return [t for t in tokenize(text) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Term → postings, stored as one compact array per term of 8-byte entries
+    `doc_id << 16 | tf` (so sorting by entry sorts by doc ID), plus
+    per-document lengths in an array indexed by doc ID. Removing a document
+    re-tokenizes its text instead of keeping a copy of its terms. Exact
+    instrument-name lookups live in services.metadata_index.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, array] = {}  # term -> sorted "Q" entries doc_id << 16 | tf
+        self._doc_len = array("I")  # 0 = not indexed
+        self._n_docs = 0
+        self._total_len = 0
+        self._lock = threading.Lock()
+
+    # -----------------------------------------------------
+    def add(self, doc_id: int, name: str, text: str):
+        counts = Counter(index_terms(f"{name} {text}"))
+        length = sum(counts.values())
+        if length == 0:
+            return
+        with self._lock:
+            for term, tf in counts.items():
+                entry = doc_id << _TF_BITS | min(tf, _TF_MASK)
+                postings = self._postings.get(term)
+                if postings is None:
+                    self._postings[term] = array("Q", [entry])
+                elif postings[-1] < entry:
+                    postings.append(entry)
+                else:
+                    postings.insert(bisect_left(postings, entry), entry)
+            if len(self._doc_len) <= doc_id:
+                self._doc_len.frombytes(bytes((doc_id + 1 - len(self._doc_len)) * self._doc_len.itemsize))
+            self._doc_len[doc_id] = length
+            self._n_docs += 1
+            self._total_len += length
+
+    def remove(self, doc_id: int, name: str, text: str):
+        """
+        Unindex a document; `name` and `text` must be what it was added with.
+        """
+        terms = set(index_terms(f"{name} {text}"))
+        with self._lock:
+            if doc_id >= len(self._doc_len) or self._doc_len[doc_id] == 0:
+                return
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                pos = bisect_left(postings, doc_id << _TF_BITS)
+                if pos < len(postings) and postings[pos] >> _TF_BITS == doc_id:
+                    del postings[pos]
+                    if not postings:
+                        del self._postings[term]
+            self._total_len -= self._doc_len[doc_id]
+            self._doc_len[doc_id] = 0
+            self._n_docs -= 1
+
+    # -----------------------------------------------------
+    def search(
+        self, query: str, top_k: int = 10, allowed: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Top-k (doc_id, BM25 score) pairs; `allowed` is a sorted ID array to restrict to.
+        """
+        matched_ids, matched_scores = [], []
+        with self._lock:
+            if self._n_docs == 0:
+                return []
+            avg_len = self._total_len / self._n_docs
+            doc_len = np.frombuffer(self._doc_len, dtype=np.uint32)
+            for term in set(index_terms(query)):
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                entries = np.array(postings, dtype=np.uint64)
+                ids = (entries >> np.uint64(_TF_BITS)).astype(np.int64)
+                tf = (entries & np.uint64(_TF_MASK)).astype(np.float64)
+                idf = math.log(1.0 + (self._n_docs - len(ids) + 0.5) / (len(ids) + 0.5))
+                norm = tf + self.k1 * (1.0 - self.b + self.b * doc_len[ids] / avg_len)
+                matched_ids.append(ids)
+                matched_scores.append(idf * tf * (self.k1 + 1.0) / norm)
+            del doc_len  # release the buffer before the array can be resized again
+        if not matched_ids:
+            return []
+
+        ids, scores = np.concatenate(matched_ids), np.concatenate(matched_scores)
+        if len(matched_ids) > 1:
+            ids, inverse = np.unique(ids, return_inverse=True)
+            scores = np.bincount(inverse, weights=scores)
+        if allowed is not None:
+            keep = np.isin(ids, allowed)
+            ids, scores = ids[keep], scores[keep]
+        top = np.argsort(-scores, kind="stable")[:top_k]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+
+# -----------------------------------------------------
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int = 60) -> List[Tuple[int, float]]:
+    """
+    Fuse ranked ID lists: score(d) = Σ 1 / (k + rank(d)), rank starting at 1.
+    """
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
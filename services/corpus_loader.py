@@ -0,0 +1,121 @@
+# services/corpus_loader.py
+"""
+Corpus Loader
+-------------
+Streaming ingestion for large knowledge files in JSON Lines format
+(one instrument object per line, same fields as knowledge/corpus.json).
+Records are read in fixed-size batches; only byte offsets (here) and
+compact columnar metadata (names, types and risk levels as small integer
+arrays, see services.metadata_index) stay in memory, and full documents are
+re-read from disk on demand.
+"""
+
+import json
+import os
+import threading
+from array import array
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List, Tuple
+
+
+Record = Tuple[int, int, Dict[str, Any]]  # (byte offset, byte length, document)
+
+
+# -----------------------------------------------------
+def iter_jsonl_batches(path: str, batch_size: int = 4096) -> Iterator[List[Record]]:
+    """
+    Yield lists of up to `batch_size` records from a JSON Lines file.
+    """
+    batch: List[Record] = []
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                batch.append((offset, len(line), json.loads(line)))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            offset += len(line)
+    if batch:
+        yield batch
+
+
+class JsonlDocuments(MutableMapping):
+    """
+    Mapping of document ID → document backed by a JSON Lines file.
+
+    Documents appended during ingestion get IDs 0..n-1 and are fetched lazily
+    by byte offset. Documents added or updated at runtime are held in memory
+    and take precedence over the file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._offsets = array("q")
+        self._lengths = array("I")
+        self._overrides: Dict[int, Dict[str, Any]] = {}
+        self._removed: set = set()
+        self._fd = os.open(path, os.O_RDONLY)
+        self._lock = threading.Lock()
+
+    # -----------------------------------------------------
+    def append(self, offset: int, length: int) -> int:
+        """
+        Register a record read from the file; returns its document ID.
+        """
+        doc_id = len(self._offsets)
+        self._offsets.append(offset)
+        self._lengths.append(length)
+        return doc_id
+
+    # -----------------------------------------------------
+    def _in_file(self, doc_id: int) -> bool:
+        return 0 <= doc_id < len(self._offsets) and doc_id not in self._removed
+
+    def __contains__(self, doc_id: object) -> bool:
+        return doc_id in self._overrides or (isinstance(doc_id, int) and self._in_file(doc_id))
+
+    def __getitem__(self, doc_id: int) -> Dict[str, Any]:
+        doc = self._overrides.get(doc_id)
+        if doc is not None:
+            return doc
+        if not self._in_file(doc_id):
+            raise KeyError(doc_id)
+        raw = os.pread(self._fd, self._lengths[doc_id], self._offsets[doc_id])
+        return json.loads(raw)
+
+    def __setitem__(self, doc_id: int, doc: Dict[str, Any]):
+        with self._lock:
+            self._overrides[doc_id] = doc
+            self._removed.discard(doc_id)
+
+    def __delitem__(self, doc_id: int):
+        with self._lock:
+            if doc_id not in self:
+                raise KeyError(doc_id)
+            self._overrides.pop(doc_id, None)
+            if doc_id < len(self._offsets):
+                self._removed.add(doc_id)
+
+    def __iter__(self) -> Iterator[int]:
+        file_count = len(self._offsets)
+        for doc_id in range(file_count):
+            if doc_id not in self._removed:
+                yield doc_id
+        for doc_id in list(self._overrides):
+            if doc_id >= file_count:
+                yield doc_id
+
+    def __len__(self) -> int:
+        file_count = len(self._offsets)
+        extra = sum(1 for doc_id in self._overrides if doc_id >= file_count)
+        return file_count - len(self._removed) + extra
+
+    # -----------------------------------------------------
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def __del__(self):
+        self.close()
@@ -0,0 +1,125 @@
+# services/embedding_batcher.py
+"""
+Embedding Batcher
+-----------------
+Dynamic micro-batching in front of an embedding model. Concurrent callers
+submit texts; a background thread gathers everything that arrives within a
+short window (or until the batch is full) and encodes it in one forward pass,
+then resolves each caller's future with its own rows.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple
+import numpy as np
+from services.tools import log_event
+
+
+EncodeFn = Callable[[List[str]], np.ndarray]
+
+
+class EmbeddingBatcher:
+    """
+    Collects encode requests for up to `max_wait_ms` or `max_batch_size` texts
+    and runs them through `encode_fn` together. Safe to call from any thread;
+    use `encode_async` from coroutines.
+    """
+
+    def __init__(self, encode_fn: EncodeFn, max_batch_size: int = 64, max_wait_ms: float = 3.0):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches = 0
+        self.requests = 0
+        self._queue: "queue.Queue[Optional[Tuple[List[str], Future]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    # -----------------------------------------------------
+    def submit(self, texts: List[str]) -> Future:
+        """
+        Queue texts for encoding; the future resolves to their embedding rows.
+        """
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((list(texts), future))
+        return future
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Blocking encode through the batcher.
+        """
+        return self.submit(texts).result()
+
+    async def encode_async(self, texts: List[str]) -> np.ndarray:
+        """
+        Awaitable encode through the batcher.
+        """
+        return await asyncio.wrap_future(self.submit(texts))
+
+    # -----------------------------------------------------
+    def close(self):
+        """
+        Stop the worker thread after it drains already-queued requests.
+        """
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    # -----------------------------------------------------
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            pending = [item]
+            size = len(item[0])
+            deadline = time.monotonic() + self.max_wait
+            stop = False
+
+            while size < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                pending.append(item)
+                size += len(item[0])
+
+            self._encode_batch(pending)
+            if stop:
+                return
+
+    def _encode_batch(self, pending: List[Tuple[List[str], Future]]):
+        texts = [text for batch, _ in pending for text in batch]
+        try:
+            embeddings = self.encode_fn(texts)
+        except Exception as e:
+            log_event("EmbeddingBatcher", f"Batch of {len(texts)} texts failed: {e}")
+            for _, future in pending:
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.requests += len(pending)
+        start = 0
+        for batch, future in pending:
+            future.set_result(embeddings[start:start + len(batch)])
+            start += len(batch)
@@ -0,0 +1,137 @@
+# services/index_cache.py
+"""
+Index Cache
+-----------
+Persists a built FAISS index next to the corpus, keyed by a fingerprint of
+the corpus contents and the embedding model. Binary (Hamming) indexes also
+keep their float32 embedding matrix, which re-scores their candidates; the
+other storages reconstruct vectors from the index and write no matrix.
+A worker whose corpus is unchanged loads these files instead of re-embedding.
+Indexes can be memory-mapped read-only, so every worker process on a host
+shares one copy in the page cache; `build_lock` makes sure only one of them
+builds a missing index.
+"""
+
+import fcntl
+import glob
+import hashlib
+import os
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+import numpy as np
+from services.tools import log_event, lazy_import
+
+faiss = lazy_import("faiss")
+
+
+CACHE_DIR_NAME = ".index_cache"
+FINGERPRINT_CHARS = 16
+CONFIG_KEY_CHARS = 8
+CACHE_FORMAT = 2  # bump when the on-disk index layout changes
+
+
+# -----------------------------------------------------
+def corpus_fingerprint(corpus_path: str, model_name: str, **config: object) -> str:
+    """
+    "<config key>-<content hash>": a hash of the model id and index settings,
+    then a hash of the corpus file together with them. Entries sharing the
+    config key are versions of the same index; only those replace each other.
+    """
+    settings = hashlib.sha256(f"{model_name}|format={CACHE_FORMAT}".encode("utf-8"))
+    for key in sorted(config):
+        settings.update(f"{key}={config[key]}".encode("utf-8"))
+    digest = settings.copy()
+    with open(corpus_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return f"{settings.hexdigest()[:CONFIG_KEY_CHARS]}-{digest.hexdigest()[:FINGERPRINT_CHARS]}"
+
+
+# -----------------------------------------------------
+def cache_paths(corpus_path: str, fingerprint: str) -> Tuple[str, str]:
+    """
+    Return the (index, embeddings) file paths for a corpus fingerprint
+    (the embeddings file only exists for binary indexes).
+    """
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(corpus_path)), CACHE_DIR_NAME)
+    stem = os.path.basename(corpus_path)
+    base = os.path.join(cache_dir, f"{stem}.{fingerprint}")
+    return f"{base}.faiss", f"{base}.npy"
+
+
+# -----------------------------------------------------
+def load_index(
+    corpus_path: str, fingerprint: str, binary: bool = False, mmap: bool = False
+) -> Optional[Tuple["faiss.Index", Optional[np.ndarray]]]:
+    """
+    Load a cached index, or None on a cache miss. `binary` selects FAISS's
+    reader for binary (Hamming) indexes and also loads their memory-mapped
+    embeddings (None for other indexes). With `mmap` the index's vector/code
+    storage is mapped read-only from the file instead of copied into the
+    process (the index must not be modified in place).
+    """
+    index_path, embeddings_path = cache_paths(corpus_path, fingerprint)
+    if not os.path.exists(index_path) or (binary and not os.path.exists(embeddings_path)):
+        return None
+    flags = 0
+    if mmap:
+        flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+    try:
+        reader = faiss.read_index_binary if binary else faiss.read_index
+        index = reader(index_path, flags)
+        embeddings = np.load(embeddings_path, mmap_mode="r") if binary else None
+    except (OSError, RuntimeError, ValueError) as e:
+        log_event("IndexCache", f"Ignoring unreadable cache {index_path}: {e}")
+        return None
+    log_event("IndexCache", f"Loaded cached index {os.path.basename(index_path)}")
+    return index, embeddings
+
+
+# -----------------------------------------------------
+def save_index(
+    corpus_path: str, fingerprint: str, index: "faiss.Index", embeddings: Optional[np.ndarray] = None
+):
+    """
+    Atomically write the index and, if given, the embeddings (binary indexes
+    only), removing stale entries for this corpus and config (other configs'
+    entries and all lock files are kept).
+    """
+    index_path, embeddings_path = cache_paths(corpus_path, fingerprint)
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+
+    if isinstance(index, faiss.IndexBinary):
+        faiss.write_index_binary(index, index_path + ".tmp")
+    else:
+        faiss.write_index(index, index_path + ".tmp")
+    if embeddings is not None:
+        with open(embeddings_path + ".tmp", "wb") as f:
+            np.save(f, np.ascontiguousarray(embeddings, dtype="float32"))
+        os.replace(embeddings_path + ".tmp", embeddings_path)
+    os.replace(index_path + ".tmp", index_path)
+
+    config_key = fingerprint.split("-")[0]
+    pattern = os.path.join(os.path.dirname(index_path), f"{os.path.basename(corpus_path)}.{config_key}-*")
+    for path in glob.glob(pattern):
+        if path.endswith((".faiss", ".npy")) and not path.startswith(index_path[: -len(".faiss")]):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    log_event("IndexCache", f"Saved index cache {os.path.basename(index_path)}")
+
+
+# -----------------------------------------------------
+@contextmanager
+def build_lock(corpus_path: str, fingerprint: str) -> Iterator[None]:
+    """
+    Exclusive cross-process lock for building one cache entry, so workers
+    starting together build it once; the others wait, then load it.
+    """
+    index_path, _ = cache_paths(corpus_path, fingerprint)
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    with open(index_path[: -len(".faiss")] + ".lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
@@ -0,0 +1,274 @@
+# services/index_factory.py
+"""
+Index Factory
+-------------
+Builds the FAISS index behind VectorStore from an IndexConfig:
+  - flat     : exact brute-force search (default, fine for small corpora)
+  - ivf_flat : inverted file over k-means cells, tuned with `nprobe`
+  - ivf_pq   : IVF with product-quantized vectors (smallest memory)
+  - hnsw     : graph-based search, tuned with `ef_search`
+Vectors are stored as float32, fp16 or 8-bit scalar-quantized codes inside
+the index, or as 1-bit sign codes ("binary") searched by Hamming distance
+and re-scored with float vectors by the caller.
+Also provides a recall-vs-latency report against the flat baseline.
+"""
+
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+from services.tools import log_event, lazy_import
+
+faiss = lazy_import("faiss")
+
+
+INDEX_KINDS = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+STORAGE_MODES = ("float32", "fp16", "sq8", "binary")
+
+# faiss.ScalarQuantizer code types, by storage mode
+_SQ_TYPES = {"fp16": "QT_fp16", "sq8": "QT_8bit"}
+
+# Same values as faiss.METRIC_*, usable without importing faiss
+METRIC_INNER_PRODUCT = 0
+METRIC_L2 = 1
+
+# FAISS wants roughly this many training points per k-means centroid
+MIN_POINTS_PER_CENTROID = 39
+
+
+@dataclass
+class IndexConfig:
+    """
+    Build-time and query-time settings for the FAISS index.
+    `nprobe` and `ef_search` are read on every search and may be changed live.
+    """
+    kind: str = "flat"
+    nlist: int = 1024           # IVF: number of k-means cells
+    pq_m: int = 16              # IVF-PQ: sub-quantizers (must divide the dimension)
+    pq_bits: int = 8            # IVF-PQ: bits per sub-quantizer code
+    hnsw_m: int = 32            # HNSW: graph neighbours per node
+    ef_construction: int = 200  # HNSW: build-time beam width
+    train_sample: int = 100_000 # max vectors used for training
+    storage: str = "float32"    # vector encoding: float32, fp16, sq8 or binary
+    rescore_factor: int = 10    # binary: candidates fetched per result for float re-scoring
+    nprobe: int = 16            # IVF: cells visited per query
+    ef_search: int = 64         # HNSW: query-time beam width
+
+    def __post_init__(self):
+        if self.kind not in INDEX_KINDS:
+            raise ValueError(f"Unknown index kind '{self.kind}'; expected one of {INDEX_KINDS}")
+        if self.storage not in STORAGE_MODES:
+            raise ValueError(f"Unknown storage mode '{self.storage}'; expected one of {STORAGE_MODES}")
+
+    # -----------------------------------------------------
+    @property
+    def is_binary(self) -> bool:
+        """Binary codes always use an exhaustive Hamming index (`kind` is ignored)."""
+        return self.storage == "binary"
+
+    @property
+    def supports_remove(self) -> bool:
+        """HNSW graphs cannot delete vectors in place."""
+        return self.is_binary or self.kind != "hnsw"
+
+    def build_key(self) -> str:
+        """Identifies the index structure (query-time knobs excluded)."""
+        if self.is_binary:
+            return "binary"
+        if self.kind == "ivf_flat":
+            key = f"ivf_flat-{self.nlist}"
+        elif self.kind == "ivf_pq":
+            return f"ivf_pq-{self.nlist}-{self.pq_m}x{self.pq_bits}"
+        elif self.kind == "hnsw":
+            key = f"hnsw-{self.hnsw_m}-{self.ef_construction}"
+        else:
+            key = "flat"
+        return key if self.storage == "float32" else f"{key}-{self.storage}"
+
+
+# -----------------------------------------------------
+def build_index(config: IndexConfig, vectors: np.ndarray, metric: int = METRIC_L2) -> "faiss.Index":
+    """
+    Create an empty index for `config` that accepts external IDs, trained on a
+    sample of `vectors`. Falls back to flat search when there are too few
+    vectors to train on. IVF indexes store IDs natively (with a hashtable
+    direct map so vectors can be reconstructed); flat and HNSW indexes are
+    wrapped in IndexIDMap2. Binary storage returns an IndexBinaryIDMap that
+    expects `binarize`d codes.
+    """
+    n, dim = vectors.shape
+    kind = config.kind
+
+    if config.is_binary:
+        if dim % 8:
+            raise ValueError(f"Binary storage needs a dimension divisible by 8, got {dim}")
+        return faiss.IndexBinaryIDMap(faiss.IndexBinaryFlat(dim))
+    qtype = getattr(faiss.ScalarQuantizer, _SQ_TYPES[config.storage]) if config.storage in _SQ_TYPES else None
+
+    if kind in ("ivf_flat", "ivf_pq"):
+        nlist = min(config.nlist, max(1, n // MIN_POINTS_PER_CENTROID))
+        min_train = max(nlist * MIN_POINTS_PER_CENTROID, 1 << config.pq_bits if kind == "ivf_pq" else 0)
+        if n < min_train:
+            log_event("IndexFactory", f"Only {n} vectors; using flat index instead of {kind}.")
+            kind = "flat"
+
+    if kind == "ivf_flat":
+        quantizer = faiss.IndexFlat(dim, metric)
+        if qtype is None:
+            inner = faiss.IndexIVFFlat(quantizer, dim, nlist, metric)
+        else:
+            inner = faiss.IndexIVFScalarQuantizer(quantizer, dim, nlist, qtype, metric)
+    elif kind == "ivf_pq":
+        if dim % config.pq_m:
+            raise ValueError(f"pq_m={config.pq_m} must divide embedding dimension {dim}")
+        inner = faiss.IndexIVFPQ(faiss.IndexFlat(dim, metric), dim, nlist, config.pq_m, config.pq_bits, metric)
+    elif kind == "hnsw":
+        if qtype is None:
+            inner = faiss.IndexHNSWFlat(dim, config.hnsw_m, metric)
+        else:
+            inner = faiss.IndexHNSWSQ(dim, qtype, config.hnsw_m, metric)
+        inner.hnsw.efConstruction = config.ef_construction
+    elif qtype is None:
+        inner = faiss.IndexFlat(dim, metric)
+    else:
+        inner = faiss.IndexScalarQuantizer(dim, qtype, metric)
+
+    if not inner.is_trained:
+        inner.train(_training_sample(vectors, config.train_sample))
+    if kind in ("ivf_flat", "ivf_pq"):
+        inner.set_direct_map_type(faiss.DirectMap.Hashtable)
+        return inner
+    return faiss.IndexIDMap2(inner)
+
+
+# -----------------------------------------------------
+def binarize(vectors: np.ndarray) -> np.ndarray:
+    """
+    1-bit sign codes (dim / 8 bytes per vector) for binary storage.
+    """
+    return np.packbits(np.asarray(vectors) > 0, axis=1)
+
+
+# -----------------------------------------------------
+def search_params(
+    config: IndexConfig, selector: Optional["faiss.IDSelector"] = None
+) -> Optional["faiss.SearchParameters"]:
+    """
+    Per-query FAISS parameters: the ID selector plus nprobe / efSearch.
+    """
+    if config.is_binary:
+        if selector is None:
+            return None
+        params = faiss.SearchParameters()
+    elif config.kind in ("ivf_flat", "ivf_pq"):
+        params = faiss.SearchParametersIVF()
+        params.nprobe = config.nprobe
+    elif config.kind == "hnsw":
+        params = faiss.SearchParametersHNSW()
+        params.efSearch = config.ef_search
+    elif selector is not None:
+        params = faiss.SearchParameters()
+    else:
+        return None
+
+    if selector is not None:
+        params.sel = selector
+    return params
+
+
+# -----------------------------------------------------
+def _training_sample(vectors: np.ndarray, size: int) -> np.ndarray:
+    if len(vectors) <= size:
+        return np.ascontiguousarray(vectors, dtype="float32")
+    rows = np.random.default_rng(0).choice(len(vectors), size=size, replace=False)
+    return np.ascontiguousarray(vectors[np.sort(rows)], dtype="float32")
+
+
+# -----------------------------------------------------
+def recall_latency_report(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    configs: List[IndexConfig],
+    top_k: int = 10,
+    metric: int = METRIC_L2,
+) -> List[Dict[str, Any]]:
+    """
+    Build each configured index over `vectors` and compare its top-k against
+    exact flat search. Configs sharing a build_key reuse one built index, so
+    sweeping nprobe / ef_search only costs the searches. Binary configs are
+    measured including their float re-scoring pass.
+    Returns one row per config with recall@k and mean per-query latency.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    queries = np.ascontiguousarray(queries, dtype="float32")
+    ids = np.arange(len(vectors), dtype="int64")
+
+    baseline = faiss.IndexFlat(vectors.shape[1], metric)
+    baseline.add(vectors)
+    _, truth = baseline.search(queries, top_k)
+
+    built: Dict[str, Any] = {}
+    report = []
+    for config in configs:
+        key = config.build_key()
+        if key not in built:
+            start = time.perf_counter()
+            index = build_index(config, vectors, metric)
+            index.add_with_ids(binarize(vectors) if config.is_binary else vectors, ids)
+            built[key] = (index, time.perf_counter() - start)
+        index, build_s = built[key]
+
+        start = time.perf_counter()
+        if config.is_binary:
+            _, candidates = index.search(binarize(queries), top_k * config.rescore_factor)
+            found = np.stack([rescore(c, q, vectors.__getitem__, top_k, metric)[0] for c, q in zip(candidates, queries)])
+        else:
+            _, found = index.search(queries, top_k, params=search_params(config))
+        elapsed = time.perf_counter() - start
+
+        hits = sum(len(set(f[f != -1]) & set(t)) for f, t in zip(found, truth))
+        report.append({
+            "index": key,
+            "nprobe": config.nprobe if config.kind.startswith("ivf") and not config.is_binary else None,
+            "ef_search": config.ef_search if config.kind == "hnsw" and not config.is_binary else None,
+            f"recall@{top_k}": hits / float(truth.size),
+            "ms_per_query": 1000.0 * elapsed / len(queries),
+            "build_s": build_s,
+        })
+    return report
+
+
+# -----------------------------------------------------
+def rescore(
+    candidates: np.ndarray,
+    query: np.ndarray,
+    lookup: Callable[[np.ndarray], np.ndarray],
+    top_k: int,
+    metric: int = METRIC_INNER_PRODUCT,
+):
+    """
+    Exact re-ranking of candidate IDs (-1 = padding) using float vectors from
+    `lookup(ids)`. Returns (ids, scores) of the best `top_k`; ids are padded
+    with -1 like FAISS.
+    """
+    candidates = candidates[candidates != -1]
+    cand_vectors = np.asarray(lookup(candidates), dtype="float32")
+    if metric == METRIC_INNER_PRODUCT:
+        scores = cand_vectors @ query
+    else:
+        scores = -((cand_vectors - query) ** 2).sum(axis=1)
+    order = np.argsort(-scores)[:top_k]
+    ids = np.full(top_k, -1, dtype="int64")
+    ids[:len(order)] = candidates[order]
+    return ids, scores[order]
+
+
+# -----------------------------------------------------
+def sweep(config: IndexConfig, **values: List[Any]) -> List[IndexConfig]:
+    """
+    Expand one config into variants, e.g. sweep(cfg, nprobe=[1, 8, 32]).
+    """
+    configs = [config]
+    for field, options in values.items():
+        configs = [replace(c, **{field: v}) for c in configs for v in options]
+    return configs
@@ -0,0 +1,294 @@
+# services/llm_cache.py
+"""
+LLM Response Cache
+------------------
+CachedLLMClient wraps any LLM client (LLMClient, AsyncLLMClient, DummyLLM)
+and answers repeated prompts without a model round-trip:
+  - exact tier    : key = hash of (model, system prompt, prompt, temperature),
+                    in an LRU with TTL, optionally persisted to SQLite so the
+                    cache survives restarts and is shared by all workers
+  - semantic tier : optional; embeds the prompt with the project's embedding
+                    model and reuses the answer of a cached prompt whose cosine
+                    similarity is at least `semantic_threshold`
+Semantic matches are only made between prompts with the same model, system
+prompt and temperature. Keep the threshold high: prompt templates that only
+differ in a few words (e.g. the client's risk level) embed very closely.
+Failed calls raise (see services.llm_policy) and are never cached.
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from services.cache import LRUCache
+from services.embedding_backends import EmbeddingBackend
+from services.tools import log_event
+
+
+DEFAULT_SEMANTIC_THRESHOLD = 0.97
+
+
+def response_cache_key(model: str, system_prompt: Optional[str], prompt: str, temperature: Optional[float]) -> str:
+    """
+    Stable key for an LLM request (same across processes and restarts).
+    """
+    payload = json.dumps([model, system_prompt, prompt, temperature], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# -----------------------------------------------------
+class SQLiteResponseStore:
+    """
+    Persistent key -> response table. Entries older than `ttl` seconds (if
+    set) are misses and are purged on open. WAL mode lets several worker
+    processes read and write the same file.
+    """
+
+    def __init__(self, path: str, ttl: Optional[float] = None):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            if ttl is not None:
+                self._conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - ttl,))
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None or (self.ttl is not None and time.time() - row[1] >= self.ttl):
+            return None
+        return row[0]
+
+    def set(self, key: str, response: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at) VALUES (?, ?, ?)",
+                (key, response, time.time()),
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SemanticResponseCache:
+    """
+    Bounded store of (prompt embedding, response) pairs, searched by cosine
+    similarity within a scope (model, system prompt, temperature). The oldest
+    entry is overwritten when full; entries older than `ttl` are ignored.
+    """
+
+    def __init__(
+        self,
+        model: Optional[EmbeddingBackend] = None,
+        model_loader: Optional[Callable[[], EmbeddingBackend]] = None,
+        threshold: float = DEFAULT_SEMANTIC_THRESHOLD,
+        maxsize: int = 1024,
+        ttl: Optional[float] = None,
+    ):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._model = model
+        self._model_loader = model_loader
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.ndarray] = None  # (maxsize, dim), allocated on first insert
+        self._entries: List[Optional[Tuple[str, str, float]]] = [None] * maxsize  # (scope, response, stored_at)
+        self._next = 0
+
+    @property
+    def model(self) -> EmbeddingBackend:
+        if self._model is None:
+            self._model = self._model_loader()
+        return self._model
+
+    def embed(self, prompt: str) -> np.ndarray:
+        return np.asarray(self.model.encode([prompt], normalize_embeddings=True), dtype="float32")[0]
+
+    # -----------------------------------------------------
+    def get(self, scope: str, vector: np.ndarray) -> Optional[Tuple[str, float]]:
+        """
+        (response, similarity) of the closest cached prompt in `scope`, if it
+        clears the threshold.
+        """
+        with self._lock:
+            if self._vectors is None:
+                return None
+            now = time.monotonic()
+            live = np.array([
+                e is not None and e[0] == scope and (self.ttl is None or now - e[2] < self.ttl)
+                for e in self._entries
+            ])
+            if not live.any():
+                return None
+            similarities = np.where(live, self._vectors @ vector, -np.inf)
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                return None
+            return self._entries[best][1], float(similarities[best])
+
+    def set(self, scope: str, vector: np.ndarray, response: str):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.maxsize, vector.shape[0]), dtype="float32")
+            self._vectors[self._next] = vector
+            self._entries[self._next] = (scope, response, time.monotonic())
+            self._next = (self._next + 1) % self.maxsize
+
+    def __len__(self) -> int:
+        return sum(e is not None for e in self._entries)
+
+
+# -----------------------------------------------------
+class CachedLLMClient:
+    """
+    Caching wrapper with the same `chat` / `achat` interface as the client it
+    wraps. Concurrent `achat` misses for the same key share one LLM call,
+    which runs in its own task, so cancelling any one caller (including the
+    first) does not cancel it for the others.
+    """
+
+    def __init__(
+        self,
+        llm: Any,
+        maxsize: int = 1024,
+        ttl: Optional[float] = 3600.0,
+        sqlite_path: Optional[str] = None,
+        semantic_model: Optional[EmbeddingBackend] = None,
+        semantic_model_loader: Optional[Callable[[], EmbeddingBackend]] = None,
+        semantic_threshold: float = DEFAULT_SEMANTIC_THRESHOLD,
+    ):
+        """
+        `sqlite_path` enables the persistent exact tier. Passing an embedding
+        model (or a loader, called on first use, e.g. VectorStoreRegistry.get_model)
+        enables the semantic tier.
+        """
+        self.llm = llm
+        self.exact = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.persistent = SQLiteResponseStore(sqlite_path, ttl=ttl) if sqlite_path else None
+        self.semantic = (
+            SemanticResponseCache(semantic_model, semantic_model_loader, semantic_threshold, maxsize, ttl)
+            if semantic_model is not None or semantic_model_loader is not None
+            else None
+        )
+        self.persistent_hits = 0
+        self.semantic_hits = 0
+        self._inflight: Dict[str, "asyncio.Task[str]"] = {}
+
+    @property
+    def model(self) -> str:
+        return getattr(self.llm, "model", type(self.llm).__name__)
+
+    @property
+    def temperature(self) -> Optional[float]:
+        return getattr(self.llm, "temperature", None)
+
+    def _scope(self, system_prompt: Optional[str]) -> str:
+        return response_cache_key(self.model, system_prompt, "", self.temperature)
+
+    # -----------------------------------------------------
+    def _lookup(
+        self,
+        key: str,
+        prompt: str,
+        system_prompt: Optional[str],
+        skip_exact: bool = False,
+    ) -> Tuple[Optional[str], Optional[np.ndarray]]:
+        """
+        Cached response for a request (or None), plus the prompt embedding
+        when the semantic tier was consulted, for reuse by `_store`.
+        """
+        response = None if skip_exact else self.exact.get(key)
+        if response is not None:
+            return response, None
+        if self.persistent is not None:
+            response = self.persistent.get(key)
+            if response is not None:
+                self.persistent_hits += 1
+                self.exact.set(key, response)
+                return response, None
+        if self.semantic is None:
+            return None, None
+        vector = self.semantic.embed(prompt)
+        match = self.semantic.get(self._scope(system_prompt), vector)
+        if match is None:
+            return None, vector
+        self.semantic_hits += 1
+        log_event("LLMCache", f"Semantic hit (similarity {match[1]:.3f}).")
+        return match[0], None
+
+    def _store(self, key: str, prompt: str, system_prompt: Optional[str], response: str, vector: Optional[np.ndarray]):
+        self.exact.set(key, response)
+        if self.persistent is not None:
+            self.persistent.set(key, response)
+        if self.semantic is not None:
+            vector = vector if vector is not None else self.semantic.embed(prompt)
+            self.semantic.set(self._scope(system_prompt), vector, response)
+
+    # -----------------------------------------------------
+    def chat(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        key = response_cache_key(self.model, system_prompt, prompt, self.temperature)
+        response, vector = self._lookup(key, prompt, system_prompt)
+        if response is None:
+            response = self.llm.chat(prompt, system_prompt=system_prompt)
+            self._store(key, prompt, system_prompt, response, vector)
+        return response
+
+    async def achat(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        key = response_cache_key(self.model, system_prompt, prompt, self.temperature)
+        response = self.exact.get(key)  # fast path without a thread hop
+        if response is not None:
+            return response
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(key, prompt, system_prompt))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        # Cancelling one caller (e.g. a disconnected client) only stops its wait;
+        # the shared call keeps running for the others and still fills the cache.
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: str, prompt: str, system_prompt: Optional[str]) -> str:
+        response, vector = await asyncio.to_thread(self._lookup, key, prompt, system_prompt, True)
+        if response is None:
+            response = await self.llm.achat(prompt, system_prompt=system_prompt)
+            await asyncio.to_thread(self._store, key, prompt, system_prompt, response, vector)
+        return response
+
+    def _finished(self, key: str, task: "asyncio.Task[str]"):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # waiters get the error; avoid "never retrieved" warnings
+
+    # -----------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss counters per tier.
+        """
+        stats = {"exact": self.exact.stats(), "persistent_hits": self.persistent_hits}
+        if self.semantic is not None:
+            stats["semantic"] = {"hits": self.semantic_hits, "size": len(self.semantic)}
+        return stats
+
+    async def aclose(self):
+        """
+        Close the SQLite store and the wrapped client (if it has `aclose`).
+        """
+        if self.persistent is not None:
+            self.persistent.close()
+        close = getattr(self.llm, "aclose", None)
+        if close is not None:
+            await close()
@@ -5,48 +5,220 @@ LLM Client Service
 Provides a common interface for all agents to interact with
 a language model (OpenAI GPT, Anthropic Claude, etc.).
 The AdvisorAgent uses this to reason and craft natural-language outputs.
+
+Every client has `achat`, so async callers can always await it.
+LLMClient blocks in `chat` (and runs it on a thread for `achat`);
+AsyncLLMClient is natively async, so an event loop can hold many
+concurrent requests over one keep-alive connection pool.
+
+Calls follow an LLMPolicy (timeouts, retries with backoff, circuit breaker;
+see services.llm_policy) and raise LLMError subclasses on failure.
 """
 
+import asyncio
 import os
-from typing import Optional
-from openai import OpenAI
+import time
+from typing import Any, Dict, List, Optional
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, OpenAI
+from services.llm_policy import (
+    CircuitBreaker,
+    CircuitOpenError,
+    LLMConnectionError,
+    LLMPolicy,
+    LLMResponseError,
+    LLMServerError,
+    LLMTimeoutError,
+    classify_error,
+)
+from services.tools import log_event
+
+
+DEFAULT_MODEL = "gpt-4o-mini"
+DEFAULT_MAX_CONCURRENCY = 64  # in-flight requests per AsyncLLMClient
+# Failures that indicate the provider is unhealthy (count towards the circuit breaker)
+_OUTAGE_ERRORS = (LLMTimeoutError, LLMConnectionError, LLMServerError)
+
+
+def _api_key() -> str:
+    # Expect the API key to be set as an environment variable
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("  OPENAI_API_KEY not set in environment.")
+    return api_key
+
+
+def build_messages(prompt: str, system_prompt: Optional[str] = None) -> List[Dict[str, str]]:
+    """
+    Chat messages for a prompt and optional system prompt.
+    """
+    messages = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+class _PolicyClient:
+    """
+    Request building and LLMPolicy bookkeeping shared by the sync and async
+    clients. The SDK's own retries are disabled; the policy is the only
+    retry layer.
+    """
+
+    def __init__(self, model: str, policy: Optional[LLMPolicy]):
+        self.model = model
+        self.temperature = 0.3
+        self.max_tokens = 400
+        self.policy = policy if policy is not None else LLMPolicy()
+        self.breaker = CircuitBreaker(self.policy.failure_threshold, self.policy.recovery_time, name=model)
+
+    def _request(self, prompt: str, system_prompt: Optional[str], timeout: float) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "messages": build_messages(prompt, system_prompt),
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "timeout": timeout,
+        }
+
+    def _attempt_timeout(self, started: float) -> float:
+        """
+        Timeout for the next attempt: the policy timeout, cut to what is left
+        of the call's deadline.
+        """
+        remaining = self.policy.deadline - (time.monotonic() - started)
+        if remaining <= 0:
+            raise LLMTimeoutError(f"LLM call exceeded its {self.policy.deadline}s deadline")
+        return min(self.policy.timeout, remaining)
+
+    def _reply(self, response) -> str:
+        self.breaker.record_success()
+        content = response.choices[0].message.content if response.choices else None
+        if not content:
+            raise LLMResponseError("LLM returned an empty response")
+        return content.strip()
+
+    def _failed(self, error: Exception, attempt: int, started: float) -> float:
+        """
+        Record a failed attempt. Returns the backoff before retrying, or
+        raises the typed error when the call should give up.
+        """
+        error = classify_error(error)
+        if isinstance(error, _OUTAGE_ERRORS):
+            self.breaker.record_failure()
+        else:
+            self.breaker.release()
+        if not error.retryable or attempt >= self.policy.max_retries or self.breaker.state == "open":
+            raise error
+        delay = self.policy.backoff(attempt, error)
+        if time.monotonic() - started + delay >= self.policy.deadline:
+            raise error
+        log_event("LLMClient", f"{type(error).__name__} on attempt {attempt + 1}; retrying in {delay:.2f}s.")
+        return delay
 
 
-class LLMClient:
+class LLMClient(_PolicyClient):
     """
     Real LLM wrapper using OpenAI's Python SDK.
     Supports both GPT-4.1 and GPT-3.5 (switchable by model name).
     """
 
-    def __init__(self, model: str = "gpt-4o-mini"):
-        # Expect the API key to be set as an environment variable
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("  OPENAI_API_KEY not set in environment.")
-        self.client = OpenAI(api_key=api_key)
-        self.model = model
+    def __init__(self, model: str = DEFAULT_MODEL, policy: Optional[LLMPolicy] = None):
+        super().__init__(model, policy)
+        self.client = OpenAI(api_key=_api_key(), max_retries=0, timeout=self.policy.timeout)
 
     # ---------------------------------------------------------------------
     def chat(self, prompt: str, system_prompt: Optional[str] = None) -> str:
         """
         Sends a chat request to the OpenAI API and returns the model's reply.
+        Raises an LLMError subclass once the policy gives up.
+        """
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            try:
+                timeout = self._attempt_timeout(started)
+                response = self.client.chat.completions.create(**self._request(prompt, system_prompt, timeout))
+                return self._reply(response)
+            except CircuitOpenError:
+                raise
+            except Exception as e:
+                time.sleep(self._failed(e, attempt, started))
+            attempt += 1
+
+    async def achat(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        """
+        `chat` on a worker thread (prefer AsyncLLMClient in async code).
         """
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": prompt})
-
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=0.3,
-                max_tokens=400,
+        return await asyncio.to_thread(self.chat, prompt, system_prompt)
+
+
+class AsyncLLMClient(_PolicyClient):
+    """
+    Async OpenAI wrapper for event-loop servers. All calls share one
+    AsyncOpenAI client, i.e. one keep-alive HTTP connection pool, and at most
+    `max_concurrency` requests are in flight; the rest wait on a semaphore
+    instead of opening more connections. Create one per process and reuse it;
+    call `aclose()` on shutdown.
+    """
+
+    def __init__(
+        self,
+        model: str = DEFAULT_MODEL,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        policy: Optional[LLMPolicy] = None,
+    ):
+        super().__init__(model, policy)
+        http_client = DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+                keepalive_expiry=30.0,
             )
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            print(f"[LLMClient ERROR]: {e}")
-            return "[LLM_ERROR] Unable to generate response."
+        )
+        self.client = AsyncOpenAI(
+            api_key=_api_key(), http_client=http_client, max_retries=0, timeout=self.policy.timeout
+        )
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    # ---------------------------------------------------------------------
+    async def achat(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        """
+        Sends a chat request to the OpenAI API and returns the model's reply.
+        Raises an LLMError subclass once the policy gives up. Time spent
+        waiting for a concurrency slot counts towards the deadline.
+        """
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            self.breaker.before_call()  # fast-fail before queueing for a slot
+            try:
+                async with self._semaphore:
+                    timeout = self._attempt_timeout(started)
+                    response = await self.client.chat.completions.create(
+                        **self._request(prompt, system_prompt, timeout)
+                    )
+                return self._reply(response)
+            except CircuitOpenError:
+                raise
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                await asyncio.sleep(self._failed(e, attempt, started))
+            attempt += 1
+
+    def chat(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        raise TypeError("AsyncLLMClient is async-only; await achat() (e.g. via AdvisorAgent.ahandle).")
+
+    async def aclose(self):
+        """
+        Close the shared HTTP connection pool.
+        """
+        await self.client.close()
 
 
 # -------------------------------------------------------------------------
@@ -55,3 +227,6 @@ class LLMClient:
 class DummyLLM:
     def chat(self, prompt: str, system_prompt: Optional[str] = None) -> str:
         return f"[MOCK_LLM_RESPONSE] {prompt[:100]}..."
+
+    async def achat(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        return self.chat(prompt, system_prompt)
@@ -0,0 +1,185 @@
+# services/llm_policy.py
+"""
+LLM Call Policy
+---------------
+Bounds how long an LLM call can take and how it fails:
+  - a per-attempt timeout and an overall deadline per call
+  - retries with exponential backoff and full jitter for transient errors
+    (timeouts, connection errors, 429 and 5xx; Retry-After is honoured)
+  - a circuit breaker that fast-fails every call for `recovery_time` seconds
+    after `failure_threshold` consecutive provider failures, then lets one
+    probe call through (half-open) to decide whether to close again
+Failures surface as the typed LLMError subclasses below instead of a
+sentinel reply string, so callers can tell an outage from a bad request.
+"""
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+import openai
+from services.tools import log_event
+
+
+# -----------------------------------------------------
+class LLMError(Exception):
+    """
+    Base class of LLM call failures. `retryable` errors are transient.
+    """
+    retryable = False
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class LLMTimeoutError(LLMError):
+    """The provider did not answer within the timeout."""
+    retryable = True
+
+
+class LLMConnectionError(LLMError):
+    """The provider could not be reached."""
+    retryable = True
+
+
+class LLMRateLimitError(LLMError):
+    """HTTP 429: too many requests or tokens."""
+    retryable = True
+
+
+class LLMServerError(LLMError):
+    """HTTP 5xx from the provider."""
+    retryable = True
+
+
+class LLMRequestError(LLMError):
+    """Non-retryable 4xx: bad request, authentication, permissions, ..."""
+
+
+class LLMResponseError(LLMError):
+    """The provider answered, but without usable content."""
+
+
+class CircuitOpenError(LLMError):
+    """The circuit breaker is open; the call was not attempted."""
+
+
+def classify_error(error: Exception) -> LLMError:
+    """
+    Map an OpenAI SDK exception onto the LLMError hierarchy.
+    """
+    if isinstance(error, LLMError):
+        return error
+    if isinstance(error, openai.APITimeoutError):
+        return LLMTimeoutError(str(error))
+    if isinstance(error, openai.APIConnectionError):
+        return LLMConnectionError(str(error))
+    if isinstance(error, openai.APIStatusError):
+        status = error.status_code
+        if status == 429:
+            return LLMRateLimitError(str(error), status, _retry_after(error))
+        if status >= 500:
+            return LLMServerError(str(error), status, _retry_after(error))
+        return LLMRequestError(str(error), status)
+    return LLMError(f"{type(error).__name__}: {error}")
+
+
+def _retry_after(error: "openai.APIStatusError") -> Optional[float]:
+    try:
+        return float(error.response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+# -----------------------------------------------------
+@dataclass(frozen=True)
+class LLMPolicy:
+    """
+    `timeout` applies to each attempt and `deadline` to the whole call
+    including retries and backoff (seconds). Backoff before retry n is drawn
+    uniformly from [0, min(backoff_max, backoff_base * 2**n)].
+    """
+    timeout: float = 30.0
+    deadline: float = 60.0
+    max_retries: int = 3
+    backoff_base: float = 0.5
+    backoff_max: float = 8.0
+    failure_threshold: int = 5
+    recovery_time: float = 30.0
+
+    def backoff(self, attempt: int, error: LLMError) -> float:
+        """
+        Seconds to wait before retrying after the `attempt`-th failure (0-based).
+        """
+        if error.retry_after is not None:
+            return min(error.retry_after, self.backoff_max)
+        return random.uniform(0.0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker (closed -> open -> half-open).
+    Thread-safe; one instance per LLM client.
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_time: float = 30.0, name: str = "LLM"):
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.name = name
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.recovery_time:
+            return "open"
+        return "half-open"
+
+    def before_call(self):
+        """
+        Raise CircuitOpenError unless a call may go out now. While half-open,
+        only one probe call at a time is let through.
+        """
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return
+            if state == "half-open" and not self._probing:
+                self._probing = True
+                return
+            remaining = self.recovery_time - (time.monotonic() - self._opened_at)
+            raise CircuitOpenError(
+                f"{self.name} circuit open after {self.failures} consecutive failures",
+                retry_after=max(0.0, remaining),
+            )
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                log_event("CircuitBreaker", f"{self.name} circuit closed.")
+            self.failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or (self._opened_at is None and self.failures >= self.failure_threshold):
+                log_event("CircuitBreaker", f"{self.name} circuit opened after {self.failures} failures.")
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def release(self):
+        """
+        End a call that neither proved nor disproved provider health
+        (e.g. a 4xx); frees the half-open probe slot.
+        """
+        with self._lock:
+            self._probing = False
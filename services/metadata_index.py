@@ -0,0 +1,183 @@
+# services/metadata_index.py
+"""
+Metadata Index
+--------------
+Compact columnar metadata over the corpus, in flat arrays indexed by document
+ID: for each categorical field (`risk_level`, `type`) a 2-byte code into that
+field's vocabulary, and a 64-bit hash of each instrument `name`, i.e. about
+12 bytes per document. VectorStore resolves a structured filter to an ID set
+here (one vectorized scan per field) and hands it to FAISS as an IDSelector,
+so filtering happens inside the search instead of over-fetching and
+discarding results in Python. Exact ticker / ISIN lookups scan the name
+hashes. Resolved ID sets and their selectors (bitmaps) are cached until the
+next add/remove.
+"""
+
+import hashlib
+import re
+import threading
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+import numpy as np
+from services.tools import lazy_import
+
+faiss = lazy_import("faiss")
+
+
+FILTERABLE_FIELDS = ("risk_level", "type")
+NO_VALUE = 0  # code of a missing field, and of every field of a removed document
+MAX_CODES = 2**16 - 1  # distinct values per field (2-byte codes)
+
+_NAME_SPLIT_RE = re.compile(r"[\s,;]+")
+
+# e.g. {"risk_level": {"low", "moderate"}, "type": "ETF"}
+Filters = Dict[str, Union[str, Iterable[str]]]
+
+
+class MetadataIndex:
+    """
+    Per-field code columns plus a name-hash column. A filter matches documents
+    whose field value is any of the listed values (OR), across all filtered
+    fields (AND). Values and names are compared case-insensitively.
+    """
+
+    def __init__(self, fields: Tuple[str, ...] = FILTERABLE_FIELDS):
+        self.fields = fields
+        self._codes = {field: array("H") for field in fields}
+        self._vocab: Dict[str, Dict[str, int]] = {field: {} for field in fields}
+        self._name_hashes = array("q")
+        self._resolved: Dict[Any, np.ndarray] = {}
+        self._selectors: Dict[Any, "faiss.IDSelector"] = {}
+        self._lock = threading.Lock()
+
+    # -----------------------------------------------------
+    def add(self, doc_id: int, doc: Dict[str, Any]):
+        with self._lock:
+            self._grow(doc_id + 1)
+            for field in self.fields:
+                self._codes[field][doc_id] = self._code(field, doc[field]) if field in doc else NO_VALUE
+            self._name_hashes[doc_id] = name_hash(str(doc.get("name", "")))
+            self._invalidate()
+
+    def remove(self, doc_id: int):
+        with self._lock:
+            if doc_id < len(self._name_hashes):
+                for field in self.fields:
+                    self._codes[field][doc_id] = NO_VALUE
+                self._name_hashes[doc_id] = 0
+            self._invalidate()
+
+    def _grow(self, size: int):
+        missing = size - len(self._name_hashes)
+        if missing > 0:
+            for codes in self._codes.values():
+                codes.frombytes(bytes(missing * codes.itemsize))
+            self._name_hashes.frombytes(bytes(missing * self._name_hashes.itemsize))
+
+    def _code(self, field: str, value: Any) -> int:
+        vocab = self._vocab[field]
+        key = _norm(value)
+        code = vocab.get(key)
+        if code is None:
+            if len(vocab) >= MAX_CODES:
+                raise ValueError(f"Field '{field}' has more than {MAX_CODES} distinct values")
+            code = vocab[key] = len(vocab) + 1  # 0 is NO_VALUE
+        return code
+
+    def _invalidate(self):
+        self._resolved.clear()
+        self._selectors.clear()
+
+    # -----------------------------------------------------
+    def resolve(self, filters: Filters) -> np.ndarray:
+        """
+        Return the sorted int64 IDs matching `filters`.
+        """
+        key = self.filter_key(filters)
+        with self._lock:
+            return self._resolve_locked(key)
+
+    def selector(self, filters: Filters) -> "faiss.IDSelector":
+        """
+        FAISS selector (an ID bitmap) for the IDs matching `filters`, built
+        once per filter and reused by every search until the index changes.
+        """
+        key = self.filter_key(filters)
+        with self._lock:
+            selector = self._selectors.get(key)
+            if selector is None:
+                ids = self._resolve_locked(key)
+                bits = np.zeros(int(ids[-1]) + 1 if len(ids) else 0, dtype=bool)
+                bits[ids] = True
+                selector = faiss.IDSelectorBitmap(np.packbits(bits, bitorder="little"))  # keeps the bitmap alive
+                self._selectors[key] = selector
+            return selector
+
+    def _resolve_locked(self, key: Tuple[Tuple[str, frozenset], ...]) -> np.ndarray:
+        cached = self._resolved.get(key)
+        if cached is not None:
+            return cached
+
+        matched: Optional[np.ndarray] = None
+        for field, values in key:
+            vocab = self._vocab[field]
+            wanted = [vocab[v] for v in values if v in vocab]
+            codes = np.frombuffer(self._codes[field], dtype=np.uint16)
+            hits = np.isin(codes, wanted)
+            matched = hits if matched is None else matched & hits
+
+        resolved = np.flatnonzero(matched) if matched is not None else np.empty(0)
+        resolved = resolved.astype("int64")
+        self._resolved[key] = resolved
+        return resolved
+
+    # -----------------------------------------------------
+    def match_names(self, query: str, allowed: Optional[np.ndarray] = None) -> Optional[List[int]]:
+        """
+        If every token of `query` is an exact instrument name (ticker, ISIN),
+        return the matching IDs (in query order); otherwise None. `allowed` is
+        a sorted ID array to restrict to.
+        """
+        tokens = [t for t in _NAME_SPLIT_RE.split(query.strip().lower()) if t]
+        if not tokens:
+            return None
+        with self._lock:
+            hashes = np.frombuffer(self._name_hashes, dtype=np.int64)
+            per_token = [np.flatnonzero(hashes == name_hash(token)) for token in tokens]
+            del hashes  # release the buffer before the array can be resized again
+        if any(len(ids) == 0 for ids in per_token):
+            return None
+        matched = [doc_id for ids in per_token for doc_id in ids.tolist()]
+        if allowed is not None:
+            matched = [doc_id for doc_id, ok in zip(matched, np.isin(matched, allowed)) if ok]
+        return list(dict.fromkeys(matched))
+
+    # -----------------------------------------------------
+    def filter_key(self, filters: Filters) -> Tuple[Tuple[str, frozenset], ...]:
+        """
+        Canonical, hashable form of `filters` (usable as a cache key).
+        """
+        key = []
+        for field, values in sorted(filters.items()):
+            if field not in self._codes:
+                raise ValueError(f"Cannot filter on '{field}'; filterable fields: {self.fields}")
+            if isinstance(values, str):
+                values = [values]
+            key.append((field, frozenset(_norm(v) for v in values)))
+        return tuple(key)
+
+
+# -----------------------------------------------------
+def name_hash(name: str) -> int:
+    """
+    Signed 64-bit hash of a normalized instrument name (0 = no name).
+    """
+    key = _norm(name)
+    if not key:
+        return 0
+    value = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little", signed=True)
+    return value or 1
+
+
+def _norm(value: Any) -> str:
+    return str(value).strip().lower()
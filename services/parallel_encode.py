@@ -0,0 +1,128 @@
+# services/parallel_encode.py
+"""
+Parallel Encoder
+----------------
+Multi-process corpus embedding for index builds. Each worker process loads
+its own copy of the model on its first task, encodes a shard of every batch
+and writes the vectors straight into a shared-memory output buffer, so large
+arrays are never pickled back through the pool's pipes. A worker that fails
+to load the model fails its task, and the error is raised in the parent
+(rather than the pool restarting the worker forever).
+"""
+
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Optional
+import numpy as np
+from services.embedding_backends import EmbeddingBackend, EmbeddingConfig, load_embedding_model
+from services.tools import log_event
+
+
+# Per-process state, set up by the first task each pool process runs
+_worker_model: Optional[EmbeddingBackend] = None
+_worker_shm: Optional[SharedMemory] = None
+_worker_out: Optional[np.ndarray] = None
+
+
+class ParallelEncoder:
+    """
+    Pool of `workers` encoder processes sharing one output buffer of
+    `capacity` rows. Use as a context manager around an index build;
+    `dimension` is known once it has been entered.
+    """
+
+    def __init__(self, embedding: EmbeddingConfig, workers: int, capacity: int = 65536):
+        self.embedding = embedding
+        self.workers = workers
+        self.capacity = capacity
+        self.dimension: Optional[int] = None
+        self._shm: Optional[SharedMemory] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    # -----------------------------------------------------
+    def __enter__(self) -> "ParallelEncoder":
+        threads = max(1, (os.cpu_count() or 1) // self.workers)
+        # spawn, not fork: forking a process that already initialized torch is unsafe
+        self._pool = ProcessPoolExecutor(
+            self.workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(threads,),
+        )
+        try:
+            # The parent never loads the model; the first worker reports the dimension.
+            self.dimension = self._pool.submit(_worker_dimension, self.embedding).result()
+            self._shm = SharedMemory(create=True, size=self.capacity * self.dimension * 4)
+        except BaseException:
+            self.close()
+            raise
+        log_event("ParallelEncoder", f"Started {self.workers} encoder processes.")
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    # -----------------------------------------------------
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode texts across the pool; returns a float32 (len(texts), dim) matrix.
+        """
+        out = np.empty((len(texts), self.dimension), dtype="float32")
+        buffer = np.ndarray((self.capacity, self.dimension), dtype="float32", buffer=self._shm.buf)
+        for start in range(0, len(texts), self.capacity):
+            chunk = texts[start:start + self.capacity]
+            shard = -(-len(chunk) // self.workers)  # ceil division
+            futures = [
+                self._pool.submit(
+                    _encode_shard, self.embedding, self._shm.name, self.capacity, self.dimension, i, chunk[i:i + shard]
+                )
+                for i in range(0, len(chunk), shard)
+            ]
+            for future in futures:
+                future.result()  # re-raises a worker's error
+            out[start:start + len(chunk)] = buffer[:len(chunk)]
+        return out
+
+
+# -----------------------------------------------------
+def _init_worker(threads: int):
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def _load_worker_model(embedding: EmbeddingConfig) -> EmbeddingBackend:
+    global _worker_model
+    if _worker_model is None:
+        _worker_model = load_embedding_model(embedding)
+    return _worker_model
+
+
+def _worker_dimension(embedding: EmbeddingConfig) -> int:
+    return _load_worker_model(embedding).get_sentence_embedding_dimension()
+
+
+def _encode_shard(
+    embedding: EmbeddingConfig, shm_name: str, capacity: int, dimension: int, start: int, texts: List[str]
+) -> int:
+    global _worker_shm, _worker_out
+    model = _load_worker_model(embedding)
+    if _worker_shm is None:
+        _worker_shm = SharedMemory(name=shm_name)
+        _worker_out = np.ndarray((capacity, dimension), dtype="float32", buffer=_worker_shm.buf)
+    vectors = model.encode(texts, show_progress_bar=False)
+    _worker_out[start:start + len(texts)] = vectors
+    return len(texts)
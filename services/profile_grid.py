@@ -0,0 +1,156 @@
+# services/profile_grid.py
+"""
+Profile Result Grid
+-------------------
+The analyst's profile query depends only on the client's (risk, goal), and
+both come from small known vocabularies. ProfileResultTable searches every
+known combination up front and serves them from a dict; novel combinations
+fall through to live search. The table is tied to VectorStore.version and
+rebuilt on the next lookup after the corpus changes. Tables only hold their
+store weakly, so a replaced store (e.g. after a registry reload) is freed.
+"""
+
+import threading
+import weakref
+from typing import Any, Dict, List, Optional, Tuple
+from services.reranker import RERANK_CANDIDATES
+from services.tools import log_event, timeit
+
+
+RISK_LEVELS = ("low", "moderate", "high")
+PROFILE_GOALS = ("retirement", "education", "income", "growth", "wealth preservation", "general")
+PROFILE_TOP_K = 3
+PROFILE_MIN_SCORE = 0.25  # cosine similarity below which an instrument is irrelevant
+PROFILE_MMR_LAMBDA = 0.7  # relevance vs. diversity of the returned instruments
+
+ProfileKey = Tuple[str, str]
+
+
+# -----------------------------------------------------
+def profile_key(risk: str, goal: str) -> ProfileKey:
+    """
+    Normalized (risk, goal) lookup key.
+    """
+    return risk.strip().lower(), goal.strip().lower()
+
+
+def profile_query(risk: str, goal: str) -> str:
+    """
+    The analyst's search query for a client profile.
+    """
+    return f"{risk} risk investment options for {goal}"
+
+
+class ProfileResultTable:
+    """
+    Precomputed `search` results for every (risk, goal) in the known grid,
+    with the same `top_k` / `min_score` / hybrid / MMR settings as the live query.
+    """
+
+    def __init__(
+        self,
+        store,
+        top_k: int = PROFILE_TOP_K,
+        min_score: Optional[float] = PROFILE_MIN_SCORE,
+        hybrid: bool = True,
+        mmr_lambda: Optional[float] = PROFILE_MMR_LAMBDA,
+        risks: Tuple[str, ...] = RISK_LEVELS,
+        goals: Tuple[str, ...] = PROFILE_GOALS,
+    ):
+        self._store = weakref.ref(store)
+        self.top_k = top_k
+        self.min_score = min_score
+        self.hybrid = hybrid
+        self.mmr_lambda = mmr_lambda
+        self.risks = tuple(r.lower() for r in risks)
+        self.goals = tuple(g.lower() for g in goals)
+        self._lock = threading.RLock()
+        self._table: Dict[ProfileKey, List[Dict[str, Any]]] = {}
+        self._version: Optional[int] = None
+
+    @property
+    def store(self):
+        store = self._store()
+        if store is None:
+            raise ReferenceError("the vector store of this ProfileResultTable has been freed")
+        return store
+
+    # -----------------------------------------------------
+    @timeit
+    def build(self):
+        """
+        Search every combination (one batch per risk level, since the risk
+        level is also the metadata filter) and swap in the new table.
+        """
+        with self._lock:
+            version = self.store.version
+            table: Dict[ProfileKey, List[Dict[str, Any]]] = {}
+            for risk in self.risks:
+                queries = [profile_query(risk, goal) for goal in self.goals]
+                result_lists = self.store.search_batch(
+                    queries,
+                    top_k=self.top_k,
+                    filters={"risk_level": risk},
+                    min_score=self.min_score,
+                    hybrid=self.hybrid,
+                    mmr_lambda=self.mmr_lambda,
+                )
+                for goal, results in zip(self.goals, result_lists):
+                    table[(risk, goal)] = results
+            self._table, self._version = table, version
+        log_event("ProfileResultTable", f"Precomputed {len(table)} profile results (corpus version {version}).")
+
+    def get(self, risk: str, goal: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Precomputed results for a known profile, or None for a novel one.
+        Rebuilds the table first if the corpus changed since it was built.
+        """
+        key = profile_key(risk, goal)
+        if key[0] not in self.risks or key[1] not in self.goals:
+            return None
+        if self._version != self.store.version:
+            with self._lock:
+                if self._version != self.store.version:  # not already rebuilt by another caller
+                    self.build()
+        results = self._table.get(key)
+        return None if results is None else [dict(r) for r in results]
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+
+# -----------------------------------------------------
+_tables: "weakref.WeakKeyDictionary[Any, Dict[tuple, ProfileResultTable]]" = weakref.WeakKeyDictionary()
+_tables_lock = threading.Lock()
+
+
+def profile_table(
+    store,
+    top_k: int = PROFILE_TOP_K,
+    min_score: Optional[float] = PROFILE_MIN_SCORE,
+    hybrid: bool = True,
+    mmr_lambda: Optional[float] = PROFILE_MMR_LAMBDA,
+) -> ProfileResultTable:
+    """
+    The shared table for `store` and these search settings, so every agent
+    using a shared store (see services.store_registry) reuses one table.
+    """
+    with _tables_lock:
+        tables = _tables.setdefault(store, {})
+        key = (top_k, min_score, hybrid, mmr_lambda)
+        if key not in tables:
+            tables[key] = ProfileResultTable(
+                store, top_k=top_k, min_score=min_score, hybrid=hybrid, mmr_lambda=mmr_lambda
+            )
+        return tables[key]
+
+
+def analyst_profile_table(store, reranking: bool = False) -> ProfileResultTable:
+    """
+    The table AnalystAgent serves from: PROFILE_TOP_K instruments picked by
+    MMR, or, when a cross-encoder re-ranks them, RERANK_CANDIDATES plain
+    candidates. The store registry prebuilds the same table.
+    """
+    if reranking:
+        return profile_table(store, top_k=RERANK_CANDIDATES, mmr_lambda=None)
+    return profile_table(store)
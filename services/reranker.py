@@ -0,0 +1,120 @@
+# services/reranker.py
+"""
+Cross-Encoder Re-ranker
+-----------------------
+Optional second retrieval stage: a small cross-encoder scores each
+(query, instrument) pair jointly, which is far more precise than comparing
+bi-encoder embeddings but too slow to run over the whole corpus. It is only
+applied to the few dozen candidates VectorStore.search returns.
+
+Scores are cached per (query, document text) in an LRU, so popular client
+profiles are re-ranked once; pairs that miss are scored in one batched call.
+The model runs on CPU and is loaded from the local HuggingFace cache only.
+"""
+
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from services.cache import LRUCache
+from services.tools import log_event, timeit
+
+if TYPE_CHECKING:
+    from sentence_transformers import CrossEncoder
+
+
+DEFAULT_RERANKER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+RERANK_CANDIDATES = 50  # candidates retrieved per query for the re-ranker
+
+
+# -----------------------------------------------------
+def load_cross_encoder(model_name: str = DEFAULT_RERANKER_MODEL) -> "CrossEncoder":
+    """
+    Load a CrossEncoder on CPU from the local model cache (no downloads).
+    """
+    from sentence_transformers import CrossEncoder
+
+    log_event("Reranker", f"Loading cross-encoder '{model_name}'...")
+    return CrossEncoder(model_name, device="cpu", local_files_only=True)
+
+
+def document_text(doc: Dict[str, Any]) -> str:
+    """
+    The passage the cross-encoder scores for an instrument.
+    """
+    return f"{doc['name']}: {doc['description']}"
+
+
+class CrossEncoderReranker:
+    """
+    Re-orders search results by cross-encoder relevance. Each result keeps its
+    retrieval `score` and gains a `rerank_score` (higher is more relevant).
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_RERANKER_MODEL,
+        model: Optional["CrossEncoder"] = None,
+        cache_size: int = 4096,
+        batch_size: int = 64,
+    ):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.score_cache = LRUCache(maxsize=cache_size)
+        self._model = model
+        self._model_lock = threading.Lock()
+
+    # -----------------------------------------------------
+    @property
+    def model(self) -> "CrossEncoder":
+        """
+        The cross-encoder, loaded on first use.
+        """
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = load_cross_encoder(self.model_name)
+        return self._model
+
+    # -----------------------------------------------------
+    def rerank(self, query: str, results: List[Dict[str, Any]], top_k: int = 3) -> List[Dict[str, Any]]:
+        """
+        The `top_k` best of `results` for `query`, by cross-encoder score.
+        """
+        return self.rerank_batch([query], [results], top_k)[0]
+
+    @timeit
+    def rerank_batch(
+        self,
+        queries: List[str],
+        result_lists: List[List[Dict[str, Any]]],
+        top_k: int = 3,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Re-rank one result list per query. Uncached pairs from all queries are
+        scored together in a single model call.
+        """
+        keys = [[(q, document_text(doc)) for doc in results] for q, results in zip(queries, result_lists)]
+        scores = [[self.score_cache.get(key) for key in row] for row in keys]
+
+        missing: List[Tuple[int, int]] = [
+            (i, j) for i, row in enumerate(scores) for j, score in enumerate(row) if score is None
+        ]
+        if missing:
+            pairs = [keys[i][j] for i, j in missing]
+            predicted = self.model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+            for (i, j), score in zip(missing, predicted):
+                scores[i][j] = round(float(score), 4)
+                self.score_cache.set(keys[i][j], scores[i][j])
+            log_event("Reranker", f"Scored {len(missing)} new pairs for {len(queries)} queries.")
+
+        reranked = []
+        for results, row in zip(result_lists, scores):
+            ranked = sorted(zip(results, row), key=lambda pair: pair[1], reverse=True)[:top_k]
+            reranked.append([dict(doc, rerank_score=score) for doc, score in ranked])
+        return reranked
+
+    # -----------------------------------------------------
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss metrics for the (query, document) score cache.
+        """
+        return self.score_cache.stats()
@@ -0,0 +1,360 @@
+# services/sharded_store.py
+"""
+Sharded Vector Store
+--------------------
+Splits the corpus into N shards (by instrument type or by a hash of the
+name), each backed by its own VectorStore. Queries are encoded once, fanned
+out to all shards in a thread pool (FAISS releases the GIL while searching)
+and the per-shard hits are merged into a global top-k with a heap.
+
+Shards can also run in separate local worker processes, each serving its
+VectorStore over a Unix socket, so the corpus is no longer limited by one
+process's memory.
+"""
+
+import heapq
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from multiprocessing import get_context
+from multiprocessing.connection import Client, Listener
+from typing import Any, Dict, List, Optional, Set
+import numpy as np
+from services.cache import LRUCache
+from services.corpus_loader import iter_jsonl_batches
+from services.index_factory import IndexConfig
+from services.metadata_index import Filters
+from services.tools import log_event, timeit, lazy_import
+from services.vector_store import (
+    VectorStore,
+    DEFAULT_CORPUS_PATH,
+    DEFAULT_MODEL_NAME,
+    EmbeddingBackend,
+    EmbeddingConfig,
+    load_embedding_model,
+)
+
+faiss = lazy_import("faiss")
+
+
+SHARD_KEYS = ("type", "hash")
+SHARD_DIR_NAME = ".shards"
+SHARD_STARTUP_POLL = 0.5  # seconds between shard process liveness checks
+
+
+# -----------------------------------------------------
+def shard_of(doc: Dict[str, Any], num_shards: int, shard_by: str = "hash") -> int:
+    """
+    Stable shard number for a document: by instrument type or by name.
+    """
+    key = doc.get("type", "") if shard_by == "type" else doc.get("name", "")
+    return zlib.crc32(str(key).strip().lower().encode("utf-8")) % num_shards
+
+
+# -----------------------------------------------------
+def partition_corpus(corpus_path: str, num_shards: int, shard_by: str = "hash") -> List[str]:
+    """
+    Write one JSON Lines file per shard next to the corpus; returns their paths.
+    Each shard is written to a temporary file and then renamed over the old
+    one, so stores still reading a previous partition (JsonlDocuments keeps
+    byte offsets into it) never see a truncated or half-written file.
+    """
+    if shard_by not in SHARD_KEYS:
+        raise ValueError(f"Unknown shard key '{shard_by}'; expected one of {SHARD_KEYS}")
+    out_dir = os.path.join(os.path.dirname(os.path.abspath(corpus_path)), SHARD_DIR_NAME)
+    os.makedirs(out_dir, exist_ok=True)
+    stem = os.path.basename(corpus_path)
+    paths = [os.path.join(out_dir, f"{stem}.{shard_by}-{i}-of-{num_shards}.jsonl") for i in range(num_shards)]
+
+    files = []
+    try:
+        for path in paths:
+            files.append(tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", dir=out_dir, prefix=os.path.basename(path) + ".", suffix=".tmp", delete=False
+            ))
+        for doc in _iter_corpus(corpus_path):
+            files[shard_of(doc, num_shards, shard_by)].write(json.dumps(doc) + "\n")
+        for f in files:
+            f.close()
+        for f, path in zip(files, paths):
+            os.replace(f.name, path)
+    except BaseException:
+        for f in files:
+            f.close()
+            if os.path.exists(f.name):
+                os.remove(f.name)
+        raise
+    return paths
+
+
+def _iter_corpus(corpus_path: str):
+    if corpus_path.endswith(".jsonl"):
+        for batch in iter_jsonl_batches(corpus_path):
+            for _, _, doc in batch:
+                yield doc
+    else:
+        with open(corpus_path, "r", encoding="utf-8") as f:
+            yield from json.load(f)
+
+
+class ShardedVectorStore:
+    """
+    Fan-out search over N VectorStore shards with a global top-k merge.
+    Semantic search only (no hybrid/BM25 fusion across shards).
+
+    With `processes=True` every shard lives in its own worker process and is
+    queried over a Unix socket; otherwise shards share this process (and its
+    embedding model). If a shard process dies while building its index, or
+    is not ready within `startup_timeout` seconds (None = no limit), all
+    shard processes are stopped and RuntimeError is raised.
+    """
+
+    def __init__(
+        self,
+        corpus_path: str = DEFAULT_CORPUS_PATH,
+        num_shards: int = 4,
+        shard_by: str = "hash",
+        processes: bool = False,
+        model_name: str = DEFAULT_MODEL_NAME,
+        model: Optional[EmbeddingBackend] = None,
+        index_config: Optional[IndexConfig] = None,
+        persist_index: bool = False,
+        query_cache_size: int = 1024,
+        embedding: Optional[EmbeddingConfig] = None,
+        startup_timeout: Optional[float] = None,
+    ):
+        log_event("ShardedVectorStore", f"Building {num_shards} shards by {shard_by}...")
+        self.num_shards = num_shards
+        self.shard_by = shard_by
+        embedding = embedding if embedding is not None else EmbeddingConfig(model_name=model_name)
+        self.model = model if model is not None else load_embedding_model(embedding)
+        self.query_cache = LRUCache(maxsize=query_cache_size)
+        self.shard_paths = partition_corpus(corpus_path, num_shards, shard_by)
+        self._shard_types = [_types_in(path) for path in self.shard_paths]
+        self._pool = ThreadPoolExecutor(max_workers=num_shards, thread_name_prefix="shard-search")
+
+        store_kwargs = {"index_config": index_config, "persist_index": persist_index}
+        if processes:
+            self._socket_dir = tempfile.mkdtemp(prefix="vector-shards-")
+            try:
+                self.shards = _start_remote_shards(
+                    self.shard_paths, self._socket_dir, embedding, store_kwargs, startup_timeout
+                )
+            except RuntimeError:
+                self._pool.shutdown()
+                shutil.rmtree(self._socket_dir, ignore_errors=True)
+                raise
+        else:
+            self._socket_dir = None
+            self.shards = [
+                VectorStore(path, embedding=embedding, model=self.model, **store_kwargs)
+                for path in self.shard_paths
+            ]
+
+    # -----------------------------------------------------
+    @timeit
+    def search(
+        self,
+        query: str,
+        top_k: int = 3,
+        filters: Optional[Filters] = None,
+        min_score: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Global top-k over all shards (see VectorStore.search).
+        """
+        return self.search_batch([query], top_k, filters, min_score)[0]
+
+    @timeit
+    def search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 3,
+        filters: Optional[Filters] = None,
+        min_score: Optional[float] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Encode all queries once, search every relevant shard in parallel and
+        merge each query's hits by score.
+        """
+        if not queries:
+            return []
+        vectors = self._embed_queries(queries)
+        shards = self._shards_for(filters)
+        futures = [self._pool.submit(shard.search_vectors, vectors, top_k, filters, min_score) for shard in shards]
+        per_shard = [future.result() for future in futures]
+
+        results = []
+        for q in range(len(queries)):
+            hits = chain.from_iterable(shard_hits[q] for shard_hits in per_shard)
+            results.append(heapq.nlargest(top_k, hits, key=lambda hit: hit["score"]))
+        log_event("ShardedVectorStore", f"Searched {len(shards)}/{self.num_shards} shards for {len(queries)} queries")
+        return results
+
+    # -----------------------------------------------------
+    def _shards_for(self, filters: Optional[Filters]) -> List[Any]:
+        """
+        With type-based sharding, skip shards that cannot match a `type` filter.
+        """
+        if self.shard_by != "type" or not filters or "type" not in filters:
+            return self.shards
+        wanted = filters["type"]
+        wanted = {wanted.strip().lower()} if isinstance(wanted, str) else {str(v).strip().lower() for v in wanted}
+        return [shard for shard, types in zip(self.shards, self._shard_types) if types & wanted]
+
+    def _embed_queries(self, queries: List[str]) -> np.ndarray:
+        cached = [self.query_cache.get(q) for q in queries]
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+        if missing:
+            fresh = np.ascontiguousarray(
+                self.model.encode([queries[i] for i in missing], show_progress_bar=False), dtype="float32"
+            )
+            faiss.normalize_L2(fresh)
+            for i, vector in zip(missing, fresh):
+                self.query_cache.set(queries[i], vector)
+                cached[i] = vector
+        return np.vstack(cached)
+
+    # -----------------------------------------------------
+    def close(self):
+        """
+        Stop the search pool and any shard worker processes.
+        """
+        self._pool.shutdown(wait=True)
+        for shard in self.shards:
+            if isinstance(shard, RemoteShard):
+                shard.close()
+        if self._socket_dir is not None:
+            shutil.rmtree(self._socket_dir, ignore_errors=True)
+
+
+# -----------------------------------------------------
+def _types_in(shard_path: str) -> Set[str]:
+    return {str(doc.get("type", "")).strip().lower() for doc in _iter_corpus(shard_path)}
+
+
+class RemoteShard:
+    """
+    Client for a shard served by another local process over a Unix socket.
+    Keeps a small pool of connections so concurrent searches don't serialize.
+    """
+
+    def __init__(self, address: str, authkey: bytes, process):
+        self.address = address
+        self.authkey = authkey
+        self.process = process
+        self._idle: List[Any] = []
+        self._lock = threading.Lock()
+
+    def search_vectors(
+        self,
+        query_vectors: np.ndarray,
+        top_k: int = 3,
+        filters: Optional[Filters] = None,
+        min_score: Optional[float] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        conn = self._acquire()
+        try:
+            conn.send(("search_vectors", (query_vectors, top_k, filters, min_score)))
+            status, payload = conn.recv()
+        except (EOFError, OSError):
+            conn.close()
+            raise
+        self._release(conn)
+        if status != "ok":
+            raise RuntimeError(f"Shard at {self.address} failed: {payload}")
+        return payload
+
+    # -----------------------------------------------------
+    def _acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return Client(self.address, family="AF_UNIX", authkey=self.authkey)
+
+    def _release(self, conn):
+        with self._lock:
+            self._idle.append(conn)
+
+    def close(self):
+        with self._lock:
+            for conn in self._idle:
+                conn.close()
+            self._idle.clear()
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join()
+
+
+# -----------------------------------------------------
+def _start_remote_shards(
+    shard_paths: List[str],
+    socket_dir: str,
+    embedding: EmbeddingConfig,
+    store_kwargs: Dict[str, Any],
+    startup_timeout: Optional[float] = None,
+) -> List[RemoteShard]:
+    ctx = get_context("spawn")
+    authkey = os.urandom(16)
+    started = []
+    for i, path in enumerate(shard_paths):
+        address = os.path.join(socket_dir, f"shard-{i}.sock")
+        ready = ctx.Event()
+        process = ctx.Process(
+            target=_serve_shard,
+            args=(address, authkey, path, embedding, store_kwargs, ready),
+            name=f"vector-shard-{i}",
+            daemon=True,
+        )
+        process.start()
+        started.append((address, process, ready))
+
+    deadline = None if startup_timeout is None else time.monotonic() + startup_timeout
+    try:
+        for _, process, ready in started:
+            while not ready.wait(SHARD_STARTUP_POLL):
+                if not process.is_alive():
+                    raise RuntimeError(
+                        f"Shard process {process.name} exited with code {process.exitcode} during startup"
+                    )
+                if deadline is not None and time.monotonic() > deadline:
+                    raise RuntimeError(f"Shard process {process.name} not ready after {startup_timeout}s")
+    except RuntimeError:
+        for _, process, _ in started:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+        raise
+    shards = [RemoteShard(address, authkey, process) for address, process, _ in started]
+    log_event("ShardedVectorStore", f"{len(shards)} shard processes ready.")
+    return shards
+
+
+def _serve_shard(
+    address: str, authkey: bytes, path: str, embedding: EmbeddingConfig, store_kwargs: Dict[str, Any], ready
+):
+    store = VectorStore(path, embedding=embedding, **store_kwargs)
+    listener = Listener(address, family="AF_UNIX", authkey=authkey)
+    ready.set()
+    while True:
+        conn = listener.accept()
+        threading.Thread(target=_handle_connection, args=(store, conn), daemon=True).start()
+
+
+def _handle_connection(store: VectorStore, conn):
+    with conn:
+        while True:
+            try:
+                method, args = conn.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                conn.send(("ok", getattr(store, method)(*args)))
+            except Exception as e:
+                conn.send(("error", repr(e)))
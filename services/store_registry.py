@@ -0,0 +1,271 @@
+# services/store_registry.py
+"""
+Vector Store Registry
+---------------------
+Process-wide cache of warm VectorStore instances and embedding models.
+Created once (e.g. at FastAPI startup) and shared by every request, so the
+embedding model is loaded and the corpus embedded only once per process.
+The embedding backend comes from an EmbeddingConfig (see
+services.embedding_backends). Query encoding for each model is micro-batched across concurrent requests.
+Models are loaded on first use; `start_warm_up` does that (and builds the
+default store and its precomputed profile results) in the background and
+reports readiness when it is done.
+
+When a corpus file changes, `reload` builds and warms a new snapshot of its
+store off to the side, then swaps it in with a single dict assignment:
+requests that already hold the old store finish on it, new requests get the
+new one, and nobody waits on the rebuild. Replace corpus files atomically
+(write + rename) so the old snapshot can keep reading its file.
+"""
+
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from services.vector_store import VectorStore, DEFAULT_CORPUS_PATH
+from services.embedding_backends import EmbeddingBackend, EmbeddingConfig, load_embedding_model
+from services.index_factory import IndexConfig
+from services.embedding_batcher import EmbeddingBatcher
+from services.profile_grid import analyst_profile_table
+from services.reranker import CrossEncoderReranker, DEFAULT_RERANKER_MODEL
+from services.tools import log_event
+
+
+class VectorStoreRegistry:
+    """
+    Hands out one shared VectorStore per (corpus path, embedding config) pair.
+    Embedding models are shared across stores that use the same config;
+    methods default to the registry's `embedding` config.
+    """
+
+    def __init__(
+        self,
+        persist_index: bool = True,
+        index_config: Optional[IndexConfig] = None,
+        micro_batching: bool = True,
+        embedding: Optional[EmbeddingConfig] = None,
+        shared_index: bool = False,
+        lexical: bool = True,
+        reranker_model: Optional[str] = None,
+    ):
+        """
+        `shared_index=True` memory-maps each cached index read-only, so all
+        worker processes on a host share one copy (see VectorStore).
+        `lexical` builds each store's BM25 index; the AnalystAgent's hybrid
+        search needs it. `reranker_model` is the cross-encoder the analyst
+        re-ranks with (None = no re-ranking); warm-up and reload prebuild the
+        profile table for the matching search settings.
+        """
+        self.embedding = embedding if embedding is not None else EmbeddingConfig()
+        self.shared_index = shared_index
+        self.lexical = lexical
+        self.reranker_model = reranker_model
+        self.persist_index = persist_index
+        self.index_config = index_config
+        self.micro_batching = micro_batching
+        self._lock = threading.RLock()  # re-entered when a store loads its model while being built
+        self._stores: Dict[Tuple[str, str], VectorStore] = {}
+        self._models: Dict[str, EmbeddingBackend] = {}
+        self._batchers: Dict[str, EmbeddingBatcher] = {}
+        self._rerankers: Dict[str, CrossEncoderReranker] = {}
+        self.ready = threading.Event()
+        self.warm_up_error: Optional[BaseException] = None
+        self._warm_up_thread: Optional[threading.Thread] = None
+        self._reload_lock = threading.Lock()  # one snapshot build at a time
+        self._stop_auto_reload = threading.Event()
+
+    # -----------------------------------------------------
+    def get_model(self, embedding: Optional[EmbeddingConfig] = None) -> EmbeddingBackend:
+        """
+        Return the shared embedding model, loading it on first use.
+        """
+        embedding = embedding or self.embedding
+        model = self._models.get(embedding.key())
+        if model is not None:
+            return model
+        with self._lock:
+            model = self._models.get(embedding.key())
+            if model is None:
+                model = load_embedding_model(embedding)
+                self._models[embedding.key()] = model
+            return model
+
+    def get_reranker(self, model_name: Optional[str] = None) -> CrossEncoderReranker:
+        """
+        Return the shared cross-encoder re-ranker (and its score cache),
+        by default for the registry's `reranker_model`.
+        The model itself is loaded on first use.
+        """
+        model_name = model_name or self.reranker_model or DEFAULT_RERANKER_MODEL
+        with self._lock:
+            reranker = self._rerankers.get(model_name)
+            if reranker is None:
+                reranker = CrossEncoderReranker(model_name)
+                self._rerankers[model_name] = reranker
+            return reranker
+
+    def _get_batcher_locked(self, embedding: EmbeddingConfig) -> Optional[EmbeddingBatcher]:
+        if not self.micro_batching:
+            return None
+        batcher = self._batchers.get(embedding.key())
+        if batcher is None:
+            batcher = EmbeddingBatcher(
+                lambda texts: self.get_model(embedding).encode(texts, show_progress_bar=False)
+            )
+            self._batchers[embedding.key()] = batcher
+        return batcher
+
+    # -----------------------------------------------------
+    def get(
+        self,
+        corpus_path: str = DEFAULT_CORPUS_PATH,
+        embedding: Optional[EmbeddingConfig] = None,
+    ) -> VectorStore:
+        """
+        Return the shared VectorStore for this corpus/embedding, building it on first use.
+        """
+        embedding = embedding or self.embedding
+        key = (os.path.abspath(corpus_path), embedding.key())
+        store = self._stores.get(key)
+        if store is not None:
+            return store
+
+        with self._lock:
+            store = self._stores.get(key)
+            if store is None:
+                log_event("VectorStoreRegistry", f"Building store for {key[0]} ({key[1]})")
+                store = self._new_store(corpus_path, embedding)
+                self._stores[key] = store
+            return store
+
+    def _new_store(self, corpus_path: str, embedding: EmbeddingConfig) -> VectorStore:
+        with self._lock:
+            batcher = self._get_batcher_locked(embedding)
+        return VectorStore(
+            corpus_path,
+            embedding=embedding,
+            model=self._models.get(embedding.key()),
+            model_loader=lambda: self.get_model(embedding),
+            persist_index=self.persist_index,
+            index_config=self.index_config,
+            batcher=batcher,
+            shared_index=self.shared_index,
+            lexical=self.lexical,
+        )
+
+    # -----------------------------------------------------
+    def reload(
+        self,
+        corpus_path: str = DEFAULT_CORPUS_PATH,
+        embedding: Optional[EmbeddingConfig] = None,
+        force: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Hot-swap the store for this corpus with a fresh snapshot built from the
+        file on disk. Skipped when the file is unchanged, unless `force`.
+        In-memory edits (add_documents etc.) of the old snapshot are dropped.
+        """
+        embedding = embedding or self.embedding
+        key = (os.path.abspath(corpus_path), embedding.key())
+        with self._reload_lock:
+            current = self._stores.get(key)
+            previous = current.snapshot_id if current is not None else None
+            if current is not None and not force and not current.corpus_changed():
+                return {"snapshot": previous, "previous": previous, "reloaded": False}
+
+            log_event("VectorStoreRegistry", f"Building new snapshot of {key[0]} (current: {previous})")
+            store = self._new_store(corpus_path, embedding)
+            store.warm_up()
+            self._build_profile_table(store)
+            with self._lock:
+                self._stores[key] = store  # atomic swap; holders of the old store are unaffected
+            log_event("VectorStoreRegistry", f"Swapped in snapshot {store.snapshot_id} (was {previous})")
+            return {
+                "snapshot": store.snapshot_id,
+                "previous": previous,
+                "reloaded": True,
+                "documents": len(store.documents),
+            }
+
+    def snapshots(self) -> List[Dict[str, Any]]:
+        """
+        The snapshot currently served for each (corpus, embedding) pair.
+        """
+        return [
+            {"corpus": path, "embedding": embedding_key, "snapshot": store.snapshot_id, "version": store.version}
+            for (path, embedding_key), store in list(self._stores.items())
+        ]
+
+    def start_auto_reload(self, interval: float = 30.0) -> threading.Thread:
+        """
+        Poll every served corpus file and `reload` the ones that changed, so
+        each worker process picks up a rebuilt corpus without a restart.
+        """
+        def run():
+            while not self._stop_auto_reload.wait(interval):
+                for (path, _), store in list(self._stores.items()):
+                    try:
+                        self.reload(path, store.embedding)
+                    except Exception as e:  # keep serving the current snapshot
+                        log_event("VectorStoreRegistry", f"Reload of {path} failed: {e}")
+
+        self._stop_auto_reload.clear()
+        thread = threading.Thread(target=run, name="vector-store-auto-reload", daemon=True)
+        thread.start()
+        return thread
+
+    # -----------------------------------------------------
+    def warm_up(
+        self,
+        corpus_path: str = DEFAULT_CORPUS_PATH,
+        embedding: Optional[EmbeddingConfig] = None,
+    ) -> VectorStore:
+        """
+        Build (or load) the store, make its embedding model resident and
+        precompute the (risk, goal) profile results.
+        """
+        store = self.get(corpus_path, embedding)
+        store.warm_up()
+        self._build_profile_table(store)
+        return store
+
+    def _build_profile_table(self, store: VectorStore):
+        # The table the AnalystAgent serving this store will look up
+        analyst_profile_table(store, reranking=self.reranker_model is not None).build()
+
+    def start_warm_up(
+        self,
+        corpus_path: str = DEFAULT_CORPUS_PATH,
+        embedding: Optional[EmbeddingConfig] = None,
+    ) -> threading.Thread:
+        """
+        Run `warm_up` in a background thread; `ready` is set once it succeeds,
+        and `warm_up_error` holds the exception if it fails.
+        """
+        def run():
+            try:
+                self.warm_up(corpus_path, embedding)
+            except Exception as e:
+                self.warm_up_error = e
+                log_event("VectorStoreRegistry", f"Warm-up failed: {e}")
+                return
+            self.ready.set()
+            log_event("VectorStoreRegistry", "Warm-up complete; ready to serve.")
+
+        self._warm_up_thread = threading.Thread(target=run, name="vector-store-warm-up", daemon=True)
+        self._warm_up_thread.start()
+        return self._warm_up_thread
+
+    # -----------------------------------------------------
+    def clear(self):
+        """
+        Drop all cached stores and models (e.g. at application shutdown).
+        """
+        self._stop_auto_reload.set()
+        with self._lock:
+            for batcher in self._batchers.values():
+                batcher.close()
+            self._batchers.clear()
+            self._stores.clear()
+            self._models.clear()
+            self._rerankers.clear()
+            self.ready.clear()
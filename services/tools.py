@@ -2,15 +2,19 @@
 """
 Tools and Utilities
 -------------------
-Contains helpers for logging, JSON parsing, and timing measurements.
+Contains helpers for logging, JSON parsing, timing measurements, lazy imports
+and a reader/writer lock.
 Used across all agents and services.
 """
 
+import importlib
 import json
+import threading
 import time
+from contextlib import contextmanager
 from datetime import datetime
 from functools import wraps
-from typing import Any, Dict
+from typing import Any, Dict, Iterator
 
 
 # -----------------------------------------------------
@@ -47,3 +51,82 @@ def timeit(func):
         log_event(func.__name__, f"Executed in {duration:.2f}s")
         return result
     return wrapper
+
+
+# -----------------------------------------------------
+class _LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, attr: str) -> Any:
+        module = self._module
+        if module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+                module = self._module
+        return getattr(module, attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name: str) -> Any:
+    """
+    Defer importing a heavy dependency (faiss, torch, ...) until it is first used,
+    so importing the services that reference it stays cheap.
+    """
+    return _LazyModule(name)
+
+
+# -----------------------------------------------------
+class ReadWriteLock:
+    """
+    Any number of concurrent readers, or one writer. A waiting writer blocks
+    new readers, so a steady stream of reads cannot starve it. Not re-entrant:
+    a thread must not take `read` again while it holds it.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        with self._cond:
+            while self._writing or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        with self._cond:
+            self._writers_waiting += 1
+            try:
+                while self._writing or self._readers:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
@@ -6,53 +6,765 @@ Handles embedding generation, FAISS index creation, and similarity search.
 Used by AnalystAgent to find semantically relevant financial instruments.
 """
 
-from sentence_transformers import SentenceTransformer
 import numpy as np
-import faiss
 import json
-from typing import List, Dict, Any
-from services.tools import log_event, timeit
+import os
+import threading
+from contextlib import nullcontext
+from itertools import islice
+from typing import Callable, List, Dict, Any, Iterator, MutableMapping, Optional, Tuple
+from services.tools import ReadWriteLock, log_event, timeit, lazy_import
+from services import index_cache
+from services.metadata_index import MetadataIndex, Filters
+from services.index_factory import IndexConfig, build_index, search_params, binarize, rescore
+from services.cache import LRUCache
+from services.embedding_batcher import EmbeddingBatcher
+from services.corpus_loader import JsonlDocuments, iter_jsonl_batches
+from services.bm25 import BM25Index, reciprocal_rank_fusion
+from services.parallel_encode import ParallelEncoder
+from services.embedding_backends import (
+    DEFAULT_MODEL_NAME,
+    EmbeddingBackend,
+    EmbeddingConfig,
+    load_embedding_model,
+)
+
+# Imported on first use: pulling in faiss / torch dominates process start-up
+faiss = lazy_import("faiss")
+
+
+DEFAULT_CORPUS_PATH = "knowledge/corpus.json"
+INGEST_BATCH_SIZE = 4096
+PARALLEL_SHARD_SIZE = 1024  # texts per worker per batch in multi-process builds
+HYBRID_MIN_DEPTH = 20  # candidates taken from each retriever before rank fusion
+MMR_POOL_FACTOR = 4  # MMR picks top_k out of top_k * MMR_POOL_FACTOR candidates
 
 
 class VectorStore:
     """
     Semantic search layer for knowledge retrieval.
+
+    Embeddings are L2-normalized and searched by inner product, so scores
+    are cosine similarities in [-1, 1] (higher is more relevant).
+
+    The corpus is a JSON array (loaded into memory) or, for large universes,
+    a JSON Lines file that is streamed in batches and read back lazily by
+    offset (see services.corpus_loader).
+
+    Documents are addressed by stable integer IDs (their position in the
+    corpus file at load time) stored in the FAISS index, so they can be
+    added, updated or removed without rebuilding the index. A single
+    instance can be shared by concurrent requests (see services.store_registry):
+    searches hold a shared read lock and run in parallel (FAISS releases the
+    GIL), edits take it exclusively. An HNSW rebuild happens before the
+    exclusive section, so searches keep using the old graph until the swap.
+
+    The index holds the only resident copy of the vectors, in the encoding
+    chosen by `IndexConfig.storage` (float32 / fp16 / sq8); `get_vectors`
+    reconstructs them. Binary storage keeps 1-bit codes in the index and
+    re-scores candidates with float vectors that are memory-mapped from the
+    index cache when `persist_index=True` (fp16 in RAM otherwise).
+    With `shared_index=True` the index itself is memory-mapped read-only from
+    the cache too, so worker processes on one host share a single copy; the
+    first in-place change copies it into private memory.
+
+    With `lexical=True` a BM25 index over name + description is maintained
+    alongside FAISS for hybrid (lexical + semantic) search; it costs memory
+    per document, so stores that only run semantic search leave it off.
+    Results can be diversified with maximal marginal relevance (`mmr_lambda`).
+
+    Query embeddings and search results are memoized in LRU caches; result
+    entries are keyed on `version`, which every corpus change increments.
+
+    The embedding model is loaded on first use, so a store whose index comes
+    from the on-disk cache starts without loading it (see `warm_up`).
+
+    A store is a snapshot of its corpus file, identified by `snapshot_id`
+    (the corpus/model/index fingerprint). Rebuilding from a changed file means
+    building a new store; the registry swaps it in (see `corpus_changed`).
     """
 
-    def __init__(self, corpus_path: str = "knowledge/corpus.json"):
+    def __init__(
+        self,
+        corpus_path: str = DEFAULT_CORPUS_PATH,
+        model_name: str = DEFAULT_MODEL_NAME,
+        model: Optional[EmbeddingBackend] = None,
+        model_loader: Optional[Callable[[], EmbeddingBackend]] = None,
+        persist_index: bool = False,
+        index_config: Optional[IndexConfig] = None,
+        query_cache_size: int = 1024,
+        query_cache_ttl: Optional[float] = 3600.0,
+        batcher: Optional[EmbeddingBatcher] = None,
+        build_workers: int = 1,
+        embedding: Optional[EmbeddingConfig] = None,
+        shared_index: bool = False,
+        lexical: bool = False,
+    ):
+        """
+        With `persist_index=True` the built index and embeddings are cached
+        next to the corpus and reused while the corpus and model are unchanged.
+        `index_config` selects the FAISS index type (flat by default).
+        `query_cache_size` / `query_cache_ttl` bound the query and result caches
+        (size 0 disables them). A shared `batcher` micro-batches query encoding
+        across concurrent callers. `build_workers > 1` embeds the corpus in that
+        many processes when the index has to be built. `model_loader` supplies
+        the model when it is first needed (defaults to `load_embedding_model`).
+        `embedding` selects the embedding backend (see services.embedding_backends);
+        without it, `model_name` on the default backend is used.
+        `shared_index=True` implies `persist_index` and memory-maps the cached index.
+        `lexical=True` builds the BM25 index that `hybrid=True` searches need.
+        """
         log_event("VectorStore", "Initializing vector store...")
-        self.model = SentenceTransformer("all-MiniLM-L6-v2")
+        self.embedding = embedding if embedding is not None else EmbeddingConfig(model_name=model_name)
+        self.model_name = self.embedding.model_name
+        self._model = model
+        self._model_loader = model_loader
+        self._model_lock = threading.Lock()
         self.corpus_path = corpus_path
-        self.corpus = self._load_corpus()
-        self.index, self.embeddings = self._build_index()
+        self.shared_index = shared_index
+        self.persist_index = persist_index or shared_index
+        self.batcher = batcher
+        self.build_workers = build_workers
+        self.index_config = index_config if index_config is not None else IndexConfig()
+        self._lock = ReadWriteLock()  # shared by searches, exclusive for edits
+        self._write_lock = threading.Lock()  # one edit at a time
+        self.version = 0
+        self.query_cache = LRUCache(maxsize=query_cache_size, ttl=query_cache_ttl)
+        self.result_cache = LRUCache(maxsize=query_cache_size, ttl=query_cache_ttl)
+
+        self.documents: MutableMapping[int, Dict[str, Any]] = (
+            JsonlDocuments(corpus_path) if corpus_path.endswith(".jsonl") else {}
+        )
+        self.metadata = MetadataIndex()
+        self.lexical = BM25Index() if lexical else None
+        self._corpus_stat = _file_stat(corpus_path)
+        self.snapshot_id = self._fingerprint()
+        self.index, embeddings = self._load_or_build_index()
+        self._index_mapped = self.shared_index
+        self._next_id = len(self.documents)
+        # Binary storage only: float vectors for re-scoring, by doc ID
+        self._rescore_base = embeddings if self.index_config.is_binary else None
+        self._rescore_overlay: Dict[int, np.ndarray] = {}
 
     # -----------------------------------------------------
-    def _load_corpus(self) -> List[Dict[str, Any]]:
+    @property
+    def model(self) -> EmbeddingBackend:
+        """
+        The embedding model, loaded on first access.
+        """
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    loader = self._model_loader or (lambda: load_embedding_model(self.embedding))
+                    self._model = loader()
+        return self._model
+
+    @property
+    def model_loaded(self) -> bool:
+        """
+        Whether the embedding model is resident yet.
+        """
+        return self._model is not None
+
+    def warm_up(self):
+        """
+        Load the embedding model and run one query through it, so the first
+        real request does not pay for model loading or lazy kernel setup.
+        """
+        self._embed(["warm-up"])
+
+    # -----------------------------------------------------
+    @property
+    def corpus(self) -> List[Dict[str, Any]]:
+        """
+        Current documents, in ID order (reads every document for JSON Lines corpora).
+        """
+        return list(self.documents.values())
+
+    def first_documents(self, n: int) -> List[Dict[str, Any]]:
+        """
+        The first `n` documents, without materializing the whole corpus.
+        """
+        return list(islice(self.documents.values(), n))
+
+    # -----------------------------------------------------
+    def _ingest_batches(self, batch_size: int = INGEST_BATCH_SIZE) -> Iterator[Tuple[np.ndarray, List[str]]]:
+        """
+        Load the corpus into `self.documents` / `self.metadata` batch by batch,
+        yielding (ids, descriptions) for each batch.
+        """
+        if isinstance(self.documents, JsonlDocuments):
+            for records in iter_jsonl_batches(self.corpus_path, batch_size):
+                ids, texts = [], []
+                for offset, length, doc in records:
+                    doc_id = self.documents.append(offset, length)
+                    self._index_metadata(doc_id, doc)
+                    ids.append(doc_id)
+                    texts.append(doc["description"])
+                yield np.array(ids, dtype="int64"), texts
+            return
+
         with open(self.corpus_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+            corpus = json.load(f)
+        for start in range(0, len(corpus), batch_size):
+            batch = corpus[start:start + batch_size]
+            for doc_id, doc in enumerate(batch, start):
+                self.documents[doc_id] = doc
+                self._index_metadata(doc_id, doc)
+            yield np.arange(start, start + len(batch), dtype="int64"), [doc["description"] for doc in batch]
+
+    # -----------------------------------------------------
+    def _embed(self, texts: List[str], batched: bool = False) -> np.ndarray:
+        """
+        Encode texts into a unit-length float32 embedding matrix.
+        With `batched=True` the request goes through the micro-batcher, if any.
+        """
+        if batched and self.batcher is not None:
+            embeddings = self.batcher.encode(texts)
+        else:
+            embeddings = self.model.encode(texts, show_progress_bar=False)
+        return _unit_rows(embeddings)
+
+    # -----------------------------------------------------
+    def _embed_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Like `_embed`, but serves repeated query strings from the query cache
+        and encodes only the misses (in one batch).
+        """
+        cached = [self.query_cache.get(q) for q in queries]
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+        if missing:
+            fresh = self._embed([queries[i] for i in missing], batched=True)
+            for i, vector in zip(missing, fresh):
+                self.query_cache.set(queries[i], vector)
+                cached[i] = vector
+        return np.vstack(cached)
+
+    # -----------------------------------------------------
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Hit/miss metrics for the query-embedding and result caches.
+        """
+        return {"query_embeddings": self.query_cache.stats(), "results": self.result_cache.stats()}
+
+    # -----------------------------------------------------
+    def _fingerprint(self) -> str:
+        return index_cache.corpus_fingerprint(
+            self.corpus_path, self.embedding.key(), index=f"{self.index_config.build_key()},cosine"
+        )
+
+    def corpus_changed(self) -> bool:
+        """
+        Whether the corpus file now differs from this snapshot (cheap stat
+        check first; the file is only re-hashed if its size or mtime moved).
+        """
+        if _file_stat(self.corpus_path) == self._corpus_stat:
+            return False
+        return self._fingerprint() != self.snapshot_id
+
+    # -----------------------------------------------------
+    def _load_or_build_index(self) -> Tuple[Any, Optional[np.ndarray]]:
+        """
+        Reuse the on-disk index cache when its fingerprint matches, else build it.
+        Returns the index and, for binary storage, the re-scoring vectors.
+        """
+        binary = self.index_config.is_binary
+        if not self.persist_index:
+            index, embeddings = self._build_index(keep_embeddings=binary)
+            return index, embeddings.astype("float16") if binary else None
+
+        fingerprint = self.snapshot_id
+
+        def load():
+            return index_cache.load_index(self.corpus_path, fingerprint, binary=binary, mmap=self.shared_index)
+
+        cached, built = load(), False
+        if cached is None:
+            with index_cache.build_lock(self.corpus_path, fingerprint):
+                cached = load()  # another worker may have built it while we waited
+                if cached is None:
+                    index, embeddings = self._build_index(keep_embeddings=binary)
+                    index_cache.save_index(self.corpus_path, fingerprint, index, embeddings)
+                    del index, embeddings  # re-open from disk so the data is memory-mapped, not resident
+                    cached, built = load(), True
+        if not built:
+            for _ in self._ingest_batches():  # documents + metadata only, no embedding
+                pass
+
+        index, embeddings = cached
+        return index, embeddings if binary else None
 
     # -----------------------------------------------------
     @timeit
-    def _build_index(self):
+    def _build_index(self, keep_embeddings: bool = False) -> Tuple[Any, Optional[np.ndarray]]:
         """
-        Encode all descriptions and build a FAISS index for fast similarity search.
+        Encode all descriptions batch by batch and build a FAISS index for fast
+        similarity search. Trainable index types are trained on the first
+        `train_sample` vectors, then later batches are appended as they stream in.
+        The float32 embedding matrix is only assembled if `keep_embeddings`.
         """
-        texts = [item["description"] for item in self.corpus]
-        embeddings = self.model.encode(texts, show_progress_bar=False)
-        dimension = embeddings.shape[1]
-        index = faiss.IndexFlatL2(dimension)
-        index.add(np.array(embeddings).astype("float32"))
-        log_event("VectorStore", f"Indexed {len(self.corpus)} documents.")
+        index = None
+        chunks: List[np.ndarray] = []
+        pending: List[Tuple[np.ndarray, np.ndarray]] = []
+        pending_count = 0
+
+        encoder = None
+        batch_size = INGEST_BATCH_SIZE
+        if self.build_workers > 1:
+            batch_size = max(INGEST_BATCH_SIZE, self.build_workers * PARALLEL_SHARD_SIZE)
+            encoder = ParallelEncoder(self.embedding, self.build_workers, capacity=batch_size)
+
+        with encoder or nullcontext():
+            for ids, texts in self._ingest_batches(batch_size):
+                vectors = _unit_rows(encoder.encode(texts)) if encoder else self._embed(texts)
+                if keep_embeddings:
+                    chunks.append(vectors)
+                if index is not None:
+                    self._add_to(index, vectors, ids)
+                    continue
+                pending.append((ids, vectors))
+                pending_count += len(ids)
+                if pending_count >= self.index_config.train_sample:
+                    index = self._new_index_from(pending)
+                    pending = []
+
+        if index is None:
+            index = self._new_index_from(pending, encoder.dimension if encoder else None)
+        embeddings = np.vstack(chunks) if keep_embeddings else None
+        log_event("VectorStore", f"Indexed {len(self.documents)} documents ({self.index_config.build_key()}).")
         return index, embeddings
 
+    def _new_index_from(
+        self, batches: List[Tuple[np.ndarray, np.ndarray]], dimension: Optional[int] = None
+    ) -> "faiss.Index":
+        if batches:
+            sample = np.vstack([vectors for _, vectors in batches])
+        else:  # empty corpus (e.g. an unused shard)
+            dimension = dimension or self.model.get_sentence_embedding_dimension()
+            sample = np.empty((0, dimension), dtype="float32")
+        index = build_index(self.index_config, sample, faiss.METRIC_INNER_PRODUCT)
+        for ids, vectors in batches:
+            self._add_to(index, vectors, ids)
+        return index
+
+    def _add_to(self, index, vectors: np.ndarray, ids: np.ndarray):
+        index.add_with_ids(binarize(vectors) if self.index_config.is_binary else vectors, ids)
+
+    # -----------------------------------------------------
+    def get_vectors(self, doc_ids: np.ndarray) -> np.ndarray:
+        """
+        Float32 embeddings for `doc_ids`, reconstructed from the index (decoded
+        from fp16 / sq8 codes) or, for binary storage, read from the re-scoring vectors.
+        """
+        doc_ids = np.asarray(doc_ids, dtype="int64")
+        if not self.index_config.is_binary:
+            return self.index.reconstruct_batch(doc_ids)
+        if not self._rescore_overlay:
+            return np.asarray(self._rescore_base[doc_ids], dtype="float32")
+        return np.array([
+            self._rescore_overlay[doc_id] if doc_id in self._rescore_overlay else self._rescore_base[doc_id]
+            for doc_id in doc_ids.tolist()
+        ], dtype="float32").reshape(len(doc_ids), -1)
+
+    # -----------------------------------------------------
+    def _rebuilt_index(
+        self, replace: Optional[Dict[int, np.ndarray]] = None, drop: Tuple[int, ...] = ()
+    ) -> "faiss.Index":
+        """
+        A new HNSW index built from the current one's vectors (no re-encoding),
+        since HNSW cannot remove vectors in place. `replace` swaps in new vectors
+        by ID. Only reads the current index, so searches can run meanwhile;
+        callers hold `_write_lock` and swap the result in.
+        """
+        ids = faiss.vector_to_array(self.index.id_map)
+        ids = ids[~np.isin(ids, drop)]
+        vectors = self.get_vectors(ids)
+        for row, doc_id in enumerate(ids.tolist()):
+            if replace and doc_id in replace:
+                vectors[row] = replace[doc_id]
+        index = build_index(self.index_config, vectors, faiss.METRIC_INNER_PRODUCT)
+        self._add_to(index, vectors, ids)
+        return index
+
+    def _detach_index(self):
+        """
+        Copy a memory-mapped (read-only) index into private memory before it
+        is changed in place. Only the first change in a worker pays for this.
+        Searches in flight finish on the mapped index; callers hold `_write_lock`.
+        """
+        if self._index_mapped:
+            # clone_index would keep viewing the mapped storage; a serialization round trip owns it
+            if self.index_config.is_binary:
+                self.index = faiss.deserialize_index_binary(faiss.serialize_index_binary(self.index))
+            else:
+                self.index = faiss.deserialize_index(faiss.serialize_index(self.index))
+            self._index_mapped = False
+            log_event("VectorStore", "Copied the shared memory-mapped index into private memory for writing.")
+
+    # -----------------------------------------------------
+    def add_documents(self, docs: List[Dict[str, Any]]) -> List[int]:
+        """
+        Embed and index new documents; returns their assigned IDs.
+        """
+        if not docs:
+            return []
+        vectors = self._embed([doc["description"] for doc in docs])
+
+        with self._write_lock:
+            self._detach_index()
+            with self._lock.write():
+                ids = np.arange(self._next_id, self._next_id + len(docs), dtype="int64")
+                self._next_id += len(docs)
+                self._add_to(self.index, vectors, ids)
+                self._remember_vectors(ids, vectors)
+                for doc_id, doc in zip(ids.tolist(), docs):
+                    self.documents[doc_id] = doc
+                    self._index_metadata(doc_id, doc)
+                self.version += 1
+
+        log_event("VectorStore", f"Added {len(docs)} documents (ids {ids[0]}..{ids[-1]}).")
+        return ids.tolist()
+
+    # -----------------------------------------------------
+    def update_document(self, doc_id: int, doc: Dict[str, Any]):
+        """
+        Replace a document; it is only re-embedded if its description changed.
+        """
+        if doc_id not in self.documents:
+            raise KeyError(f"Unknown document id: {doc_id}")
+
+        old = self.documents[doc_id]
+        if old.get("description") == doc.get("description"):
+            with self._write_lock, self._lock.write():
+                self._replace_document(doc_id, doc)
+            return
+
+        vector = self._embed([doc["description"]])
+        ids = np.array([doc_id], dtype="int64")
+        with self._write_lock:
+            rebuilt = None
+            if self.index_config.supports_remove:
+                self._detach_index()
+            else:
+                rebuilt = self._rebuilt_index(replace={doc_id: vector[0]})
+            with self._lock.write():
+                if rebuilt is None:
+                    self.index.remove_ids(ids)
+                    self._add_to(self.index, vector, ids)
+                else:
+                    self.index, self._index_mapped = rebuilt, False
+                self._remember_vectors(ids, vector)
+                self._replace_document(doc_id, doc)
+        log_event("VectorStore", f"Updated document {doc_id} ({doc.get('name')}).")
+
+    # -----------------------------------------------------
+    def remove_documents(self, doc_ids: List[int]) -> int:
+        """
+        Remove documents by ID; returns how many were removed.
+        """
+        with self._write_lock:
+            known = [doc_id for doc_id in doc_ids if doc_id in self.documents]
+            if not known:
+                return 0
+            rebuilt = None
+            if self.index_config.supports_remove:
+                self._detach_index()
+            else:
+                rebuilt = self._rebuilt_index(drop=tuple(known))
+            with self._lock.write():
+                if rebuilt is None:
+                    self.index.remove_ids(np.array(known, dtype="int64"))
+                else:
+                    self.index, self._index_mapped = rebuilt, False
+                for doc_id in known:
+                    self._rescore_overlay.pop(doc_id, None)
+                for doc_id in known:
+                    self._unindex_metadata(doc_id, self.documents.pop(doc_id))
+                self.version += 1
+
+        log_event("VectorStore", f"Removed {len(known)} documents.")
+        return len(known)
+
+    # -----------------------------------------------------
+    def _replace_document(self, doc_id: int, doc: Dict[str, Any]):
+        self._unindex_metadata(doc_id, self.documents[doc_id])
+        self.documents[doc_id] = doc
+        self._index_metadata(doc_id, doc)
+        self.version += 1
+
+    def _index_metadata(self, doc_id: int, doc: Dict[str, Any]):
+        self.metadata.add(doc_id, doc)
+        if self.lexical is not None:
+            self.lexical.add(doc_id, str(doc.get("name", "")), doc.get("description", ""))
+
+    def _unindex_metadata(self, doc_id: int, doc: Dict[str, Any]):
+        self.metadata.remove(doc_id)
+        if self.lexical is not None:
+            self.lexical.remove(doc_id, str(doc.get("name", "")), doc.get("description", ""))
+
+    def _remember_vectors(self, ids: np.ndarray, vectors: np.ndarray):
+        """
+        Binary storage: keep re-scoring vectors for runtime adds/updates (the
+        base matrix may be a read-only memory map).
+        """
+        if self.index_config.is_binary:
+            for doc_id, vector in zip(ids.tolist(), vectors):
+                self._rescore_overlay[doc_id] = vector.astype("float16")
+
     # -----------------------------------------------------
     @timeit
-    def search(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
+    def search(
+        self,
+        query: str,
+        top_k: int = 3,
+        filters: Optional[Filters] = None,
+        min_score: Optional[float] = None,
+        hybrid: bool = False,
+        mmr_lambda: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
         """
-        Perform vector similarity search and return top-k matching items.
+        Perform vector similarity search and return up to top-k matching items.
+        Each hit is a copy of the corpus entry with its cosine `score` added.
+        `filters` restricts candidates by metadata, e.g. {"risk_level": {"low", "moderate"}};
+        semantic hits scoring below `min_score` are dropped, so the result may be empty.
+
+        With `hybrid=True` (stores built with `lexical=True` only), BM25 and
+        semantic rankings are merged by reciprocal rank fusion: hits are
+        ordered by `fused_score`, `score` stays the cosine and BM25-only
+        candidates are held to `min_score` as well. A query made only of
+        instrument names ("VTI", "VTI, AGG") is answered from the metadata
+        name column alone, with score 1.0 and no embedding.
+
+        With `mmr_lambda` set, top_k is picked from a larger candidate pool by
+        maximal marginal relevance, trading relevance (1.0) against novelty
+        (0.0) so near-duplicate instruments are not all returned.
         """
-        query_vector = self.model.encode([query], show_progress_bar=False)
-        D, I = self.index.search(np.array(query_vector).astype("float32"), top_k)
-        results = [self.corpus[i] for i in I[0]]
+        results = self._cached_search([query], top_k, filters, min_score, hybrid, mmr_lambda)[0]
         log_event("VectorStore", f"Search query: '{query}' → Top {top_k} results: {[r['name'] for r in results]}")
         return results
+
+    # -----------------------------------------------------
+    @timeit
+    def search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 3,
+        filters: Optional[Filters] = None,
+        min_score: Optional[float] = None,
+        hybrid: bool = False,
+        mmr_lambda: Optional[float] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search several queries with one encoder pass and one FAISS call.
+        Returns one result list per query, in input order (see `search`).
+        """
+        if not queries:
+            return []
+        results = self._cached_search(queries, top_k, filters, min_score, hybrid, mmr_lambda)
+        log_event("VectorStore", f"Batch search: {len(queries)} queries → Top {top_k} results each")
+        return results
+
+    # -----------------------------------------------------
+    def _cached_search(
+        self,
+        queries: List[str],
+        top_k: int,
+        filters: Optional[Filters],
+        min_score: Optional[float],
+        hybrid: bool = False,
+        mmr_lambda: Optional[float] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Serve each query from the result cache when possible; embed and search
+        the remaining queries together.
+        """
+        if hybrid and self.lexical is None:
+            raise ValueError("Hybrid search needs a VectorStore built with lexical=True")
+        filter_key = self.metadata.filter_key(filters) if filters else None
+        keys = [(q, top_k, filter_key, min_score, hybrid, mmr_lambda, self.version) for q in queries]
+        hits = [self.result_cache.get(key) for key in keys]
+        missing = [i for i, h in enumerate(hits) if h is None]
+
+        allowed = None
+        if hybrid and missing:
+            allowed = self.metadata.resolve(filters) if filters else None
+            semantic = []
+            for i in missing:
+                exact = self.metadata.match_names(queries[i], allowed)
+                if exact:
+                    hits[i] = [(doc_id, 1.0) for doc_id in exact[:top_k]]
+                    self.result_cache.set(keys[i], hits[i])
+                else:
+                    semantic.append(i)
+            missing = semantic
+
+        if missing:
+            pool = top_k * MMR_POOL_FACTOR if mmr_lambda is not None else top_k
+            depth = max(pool, HYBRID_MIN_DEPTH) if hybrid else pool
+            vectors = self._embed_queries([queries[i] for i in missing])
+            for i, vector, found in zip(missing, vectors, self._search_vectors(vectors, depth, filters, min_score)):
+                if hybrid:
+                    found = self._fuse_lexical(queries[i], vector, found, depth, allowed, min_score)[:pool]
+                if mmr_lambda is not None:
+                    found = self._diversify(vector, found, top_k, mmr_lambda)
+                self.result_cache.set(keys[i], found)
+                hits[i] = found
+        return [self._materialize(h) for h in hits]
+
+    # -----------------------------------------------------
+    def _fuse_lexical(
+        self,
+        query: str,
+        query_vector: np.ndarray,
+        semantic: List[Tuple[int, float]],
+        depth: int,
+        allowed: Optional[np.ndarray],
+        min_score: Optional[float],
+    ) -> List[Tuple[int, float, float]]:
+        """
+        Reciprocal-rank fusion of semantic hits with the BM25 ranking, as
+        (doc_id, cosine score, fused score). BM25-only candidates get their
+        cosine from the stored vectors and are dropped below `min_score`.
+        """
+        cosine = dict(semantic)
+        lexical = [doc_id for doc_id, _ in self.lexical.search(query, depth, allowed)]
+        with self._lock.read():
+            unscored = [d for d in lexical if d not in cosine and d in self.documents]
+            if unscored:
+                vectors = self.get_vectors(np.array(unscored, dtype="int64"))
+                cosine.update((d, round(float(v), 4)) for d, v in zip(unscored, vectors @ query_vector))
+        cutoff = -np.inf if min_score is None else min_score
+        lexical = [d for d in lexical if cosine.get(d, -np.inf) >= cutoff]
+        fused = reciprocal_rank_fusion([[d for d, _ in semantic], lexical])
+        return [(doc_id, cosine[doc_id], round(score, 6)) for doc_id, score in fused]
+
+    # -----------------------------------------------------
+    def _diversify(
+        self,
+        query_vector: np.ndarray,
+        hits: List[Tuple[int, float]],
+        top_k: int,
+        mmr_lambda: float,
+    ) -> List[Tuple[int, float]]:
+        """
+        Re-rank hits by maximal marginal relevance over their stored vectors,
+        keeping each hit's original score.
+        """
+        if len(hits) <= 1:
+            return hits[:top_k]
+        with self._lock.read():
+            hits = [hit for hit in hits if hit[0] in self.documents]  # skip docs removed since the search
+            candidates = self.get_vectors(np.array([hit[0] for hit in hits], dtype="int64"))
+        order = maximal_marginal_relevance(query_vector, candidates, top_k, mmr_lambda)
+        return [hits[j] for j in order]
+
+    # -----------------------------------------------------
+    def _materialize(self, hits: List[tuple]) -> List[Dict[str, Any]]:
+        """
+        Turn (doc_id, score[, fused_score]) hits into result dicts (copies of
+        corpus entries).
+        """
+        results = []
+        for doc_id, score, *fused in hits:
+            if doc_id in self.documents:
+                result = dict(self.documents[doc_id], score=score)
+                if fused:
+                    result["fused_score"] = fused[0]
+                results.append(result)
+        return results
+
+    # -----------------------------------------------------
+    def search_vectors(
+        self,
+        query_vectors: np.ndarray,
+        top_k: int = 3,
+        filters: Optional[Filters] = None,
+        min_score: Optional[float] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search with pre-computed unit-length query vectors (bypasses the caches),
+        e.g. when a sharded front-end has already encoded the queries.
+        """
+        found = self._search_vectors(np.ascontiguousarray(query_vectors, dtype="float32"), top_k, filters, min_score)
+        return [self._materialize(hits) for hits in found]
+
+    # -----------------------------------------------------
+    def _search_vectors(
+        self,
+        query_vectors: np.ndarray,
+        top_k: int,
+        filters: Optional[Filters] = None,
+        min_score: Optional[float] = None,
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Run FAISS for pre-computed query vectors; returns (doc_id, score) per hit.
+        """
+        selector = None
+        if filters:
+            allowed = self.metadata.resolve(filters)
+            if len(allowed) == 0:
+                return [[] for _ in range(len(query_vectors))]
+            selector = self.metadata.selector(filters)
+        params = search_params(self.index_config, selector)
+        cutoff = -np.inf if min_score is None else min_score
+
+        with self._lock.read():
+            if self.index_config.is_binary:
+                fetch = top_k * self.index_config.rescore_factor
+                _, candidates = self.index.search(binarize(query_vectors), fetch, params=params)
+                ranked = [rescore(c, q, self.get_vectors, top_k) for c, q in zip(candidates, query_vectors)]
+                D = [scores for _, scores in ranked]
+                I = [ids for ids, _ in ranked]
+            else:
+                D, I = self.index.search(query_vectors, top_k, params=params)
+            return [
+                [(int(i), round(float(d), 4)) for d, i in zip(scores, ids) if i != -1 and d >= cutoff]
+                for scores, ids in zip(D, I)
+            ]
+
+
+# -----------------------------------------------------
+def maximal_marginal_relevance(
+    query: np.ndarray,
+    candidates: np.ndarray,
+    top_k: int,
+    mmr_lambda: float = 0.5,
+) -> List[int]:
+    """
+    Greedy MMR over unit-length `candidates` (rows): each step picks the row
+    maximizing mmr_lambda * sim(query, row) - (1 - mmr_lambda) * max sim(row, picked).
+    The candidate Gram matrix is computed once; each step is one vector update.
+    Returns the picked row indices, in pick order.
+    """
+    n = len(candidates)
+    if n == 0 or top_k <= 0:
+        return []
+    relevance = candidates @ query
+    similarity = candidates @ candidates.T
+    picked = [int(np.argmax(relevance))]
+    redundancy = similarity[picked[0]].copy()
+    available = np.ones(n, dtype=bool)
+    available[picked[0]] = False
+    for _ in range(min(top_k, n) - 1):
+        scores = mmr_lambda * relevance - (1.0 - mmr_lambda) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        picked.append(best)
+        available[best] = False
+        np.maximum(redundancy, similarity[best], out=redundancy)
+    return picked
+
+
+# -----------------------------------------------------
+def _file_stat(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _unit_rows(embeddings: np.ndarray) -> np.ndarray:
+    """
+    Contiguous float32 copy of `embeddings` with L2-normalized rows.
+    """
+    embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+    faiss.normalize_L2(embeddings)
+    return embeddings
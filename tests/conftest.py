@@ -0,0 +1,41 @@
+# tests/conftest.py
+"""
+Shared fixtures. Tests use the hashing embedding backend, so they run
+without model downloads (see services.embedding_backends).
+"""
+
+import json
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("EMBEDDING_BACKEND", "hashing")
+
+from services.embedding_backends import EmbeddingConfig  # noqa: E402
+
+
+CORPUS = [
+    {"name": "VTI", "type": "ETF", "risk_level": "moderate",
+     "description": "Total US stock market ETF suitable for long-term investors."},
+    {"name": "AGG", "type": "Bond", "risk_level": "low",
+     "description": "US aggregate bond ETF suitable for conservative investors."},
+    {"name": "QQQ", "type": "ETF", "risk_level": "high",
+     "description": "Nasdaq 100 ETF with higher volatility and growth potential."},
+    {"name": "ESGU", "type": "ETF", "risk_level": "moderate",
+     "description": "ESG-screened S&P 500 ETF for socially conscious investors."},
+    {"name": "TIP", "type": "Bond", "risk_level": "low",
+     "description": "Treasury inflation-protected securities for capital preservation."},
+]
+
+
+@pytest.fixture
+def hashing():
+    return EmbeddingConfig(backend="hashing")
+
+
+@pytest.fixture
+def corpus_path(tmp_path):
+    path = tmp_path / "corpus.json"
+    path.write_text(json.dumps(CORPUS))
+    return str(path)
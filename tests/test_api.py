@@ -0,0 +1,35 @@
+# tests/test_api.py
+
+import json
+import pytest
+from fastapi.testclient import TestClient
+from api.server import app
+from tests.conftest import CORPUS
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    (tmp_path / "knowledge").mkdir()
+    (tmp_path / "knowledge" / "corpus.json").write_text(json.dumps(CORPUS))
+    monkeypatch.chdir(tmp_path)  # the server uses the default relative corpus path
+    with TestClient(app) as client:
+        app.state.vector_stores._warm_up_thread.join()
+        yield client
+
+
+def test_reload_is_disabled_without_admin_token(client, monkeypatch):
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    assert client.post("/admin/reload?force=true").status_code == 404
+
+
+def test_reload_requires_matching_token(client, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+    assert client.post("/admin/reload").status_code == 403
+    assert client.post("/admin/reload", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    response = client.post("/admin/reload", headers={"X-Admin-Token": "s3cret"})
+    assert response.status_code == 200 and response.json()["reloaded"] is False
+
+
+def test_simulate(client):
+    response = client.post("/simulate")
+    assert response.status_code == 200 and response.json()["status"] == "resolved"
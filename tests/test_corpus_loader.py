@@ -0,0 +1,48 @@
+# tests/test_corpus_loader.py
+
+import json
+import pytest
+from services.corpus_loader import JsonlDocuments, iter_jsonl_batches
+from services.vector_store import VectorStore
+from tests.conftest import CORPUS
+
+
+@pytest.fixture
+def jsonl_path(tmp_path):
+    path = tmp_path / "corpus.jsonl"
+    path.write_text("".join(json.dumps(doc) + "\n" for doc in CORPUS[:3]) + "\n" +
+                    "".join(json.dumps(doc) + "\n" for doc in CORPUS[3:]))
+    return str(path)
+
+
+def test_iter_jsonl_batches_skips_blank_lines(jsonl_path):
+    batches = list(iter_jsonl_batches(jsonl_path, batch_size=2))
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert [doc for batch in batches for _, _, doc in batch] == CORPUS
+
+
+def test_documents_are_read_back_by_offset(jsonl_path):
+    docs = JsonlDocuments(jsonl_path)
+    for batch in iter_jsonl_batches(jsonl_path):
+        for offset, length, _ in batch:
+            docs.append(offset, length)
+    assert [docs[i] for i in range(len(CORPUS))] == CORPUS
+
+    docs[1] = dict(CORPUS[1], description="edited")
+    docs[len(CORPUS)] = {"name": "NEW"}
+    del docs[2]
+    assert docs[1]["description"] == "edited"
+    assert 2 not in docs and len(docs) == len(CORPUS)
+    assert list(docs) == [0, 1, 3, 4, 5]
+    with pytest.raises(KeyError):
+        docs[2]
+    docs.close()
+
+
+def test_jsonl_store_matches_json_store(jsonl_path, corpus_path, hashing):
+    streamed = VectorStore(jsonl_path, embedding=hashing, lexical=True)
+    loaded = VectorStore(corpus_path, embedding=hashing)
+    assert isinstance(streamed.documents, JsonlDocuments)
+    for query, filters in [("bond investors", None), ("ETF", {"risk_level": "moderate"})]:
+        assert streamed.search(query, top_k=3, filters=filters) == loaded.search(query, top_k=3, filters=filters)
+    assert streamed.search("QQQ", hybrid=True)[0]["name"] == "QQQ"
@@ -0,0 +1,24 @@
+# tests/test_embedding_backends.py
+
+import numpy as np
+import pytest
+from services.embedding_backends import EmbeddingBackend, EmbeddingConfig, HashingEmbedder, load_embedding_model
+
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        EmbeddingBackend()
+
+
+def test_hashing_backend_is_deterministic_and_normalized(hashing):
+    model = load_embedding_model(hashing)
+    assert isinstance(model, HashingEmbedder)
+    a = model.encode(["bond fund for income", "bond fund for income"], normalize_embeddings=True)
+    assert a.shape == (2, model.get_sentence_embedding_dimension())
+    assert np.array_equal(a[0], a[1])
+    assert np.allclose(np.linalg.norm(a, axis=1), 1.0)
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        EmbeddingConfig(backend="tensorflow")
@@ -0,0 +1,48 @@
+# tests/test_embedding_batcher.py
+
+import asyncio
+import threading
+import numpy as np
+import pytest
+from services.embedding_backends import HashingEmbedder
+from services.embedding_batcher import EmbeddingBatcher
+
+
+def test_concurrent_requests_share_batches():
+    model = HashingEmbedder(dimension=32)
+    batcher = EmbeddingBatcher(model.encode, max_batch_size=64, max_wait_ms=50)
+    texts = [f"query number {i}" for i in range(20)]
+    results = [None] * len(texts)
+    start = threading.Barrier(len(texts))
+
+    def worker(i):
+        start.wait()
+        results[i] = batcher.encode([texts[i]])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(texts))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    batcher.close()
+
+    expected = model.encode(texts)
+    for i, rows in enumerate(results):
+        assert np.array_equal(rows, expected[i:i + 1])
+    assert batcher.requests == len(texts)
+    assert batcher.batches < len(texts)
+
+
+def test_encode_async_and_errors_propagate():
+    batcher = EmbeddingBatcher(HashingEmbedder(dimension=8).encode)
+    rows = asyncio.run(batcher.encode_async(["a", "b"]))
+    assert rows.shape == (2, 8)
+    batcher.close()
+
+    def fail(texts):
+        raise RuntimeError("model crashed")
+
+    failing = EmbeddingBatcher(fail)
+    with pytest.raises(RuntimeError, match="model crashed"):
+        failing.encode(["x"])
+    failing.close()
@@ -0,0 +1,84 @@
+# tests/test_hybrid_search.py
+
+import math
+import numpy as np
+import pytest
+from services.bm25 import BM25Index, index_terms
+from services.vector_store import VectorStore
+from tests.conftest import CORPUS
+
+
+def test_bm25_ignores_stopwords():
+    index = BM25Index()
+    index.add(0, "AGG", "Bond ETF for conservative investors.")
+    assert index.search("weather for paris") == []
+    assert [doc_id for doc_id, _ in index.search("bond for retirement")] == [0]
+
+
+def test_hybrid_search_respects_min_score(corpus_path, hashing):
+    store = VectorStore(corpus_path, embedding=hashing, lexical=True)
+    query = "weather forecast for paris tomorrow"
+    assert store.search(query, min_score=0.99) == []
+    assert store.search(query, min_score=0.99, hybrid=True) == []
+
+
+def test_hybrid_hits_keep_cosine_score(corpus_path, hashing):
+    store = VectorStore(corpus_path, embedding=hashing, lexical=True)
+    query = "bond ETF for conservative investors"
+    semantic = {r["name"]: r["score"] for r in store.search(query, top_k=5)}
+    hybrid = store.search(query, top_k=3, min_score=0.1, hybrid=True)
+    assert hybrid and all(r["score"] >= 0.1 for r in hybrid)
+    for r in hybrid:
+        if r["name"] in semantic:
+            assert r["score"] == semantic[r["name"]]
+    fused = [r["fused_score"] for r in hybrid]
+    assert fused == sorted(fused, reverse=True)
+
+
+def test_name_query_is_answered_lexically(corpus_path, hashing):
+    store = VectorStore(corpus_path, embedding=hashing, lexical=True)
+    assert [r["name"] for r in store.search("VTI, AGG", hybrid=True)] == ["VTI", "AGG"]
+
+
+def reference_bm25(docs, query, k1=1.5, b=0.75):
+    terms = {doc_id: index_terms(text) for doc_id, text in docs.items()}
+    avg_len = sum(map(len, terms.values())) / len(terms)
+    scores = {}
+    for term in set(index_terms(query)):
+        df = sum(term in t for t in terms.values())
+        idf = math.log(1.0 + (len(terms) - df + 0.5) / (df + 0.5))
+        for doc_id, t in terms.items():
+            tf = t.count(term)
+            if tf:
+                norm = tf + k1 * (1.0 - b + b * len(t) / avg_len)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1.0) / norm
+    return scores
+
+
+def test_bm25_postings_survive_updates_and_removals():
+    index = BM25Index()
+    docs = {i: f"{doc['name']} {doc['description']}" for i, doc in enumerate(CORPUS)}
+    for doc_id, text in docs.items():
+        index.add(doc_id, "", text)
+    index.remove(1, "", docs[1])  # update a document in the middle of the postings
+    docs[1] = "AGG Short-term bond ETF for cash and bond ladders."
+    index.add(1, "", docs[1])
+    index.remove(3, "", docs.pop(3))
+
+    for query in ("bond ETF investors", "treasury inflation", "ESG screened"):
+        expected = reference_bm25(docs, query)
+        found = dict(index.search(query, top_k=10))
+        assert found.keys() == expected.keys()
+        assert all(math.isclose(found[d], expected[d]) for d in found)
+    assert [d for d, _ in index.search("bond", allowed=np.array([1, 4]))] == [1]
+
+    for doc_id, text in docs.items():
+        index.remove(doc_id, "", text)
+    assert index.search("bond ETF") == [] and not index._postings
+
+
+def test_hybrid_search_needs_lexical_index(corpus_path, hashing):
+    store = VectorStore(corpus_path, embedding=hashing)
+    assert store.lexical is None
+    with pytest.raises(ValueError, match="lexical=True"):
+        store.search("bond", hybrid=True)
@@ -0,0 +1,82 @@
+# tests/test_index_cache.py
+
+import glob
+import json
+import os
+import pytest
+from services.index_factory import IndexConfig
+from services.vector_store import VectorStore
+from tests.conftest import CORPUS
+
+CONFIGS = [IndexConfig(), IndexConfig(kind="hnsw"), IndexConfig(storage="sq8"), IndexConfig(storage="binary")]
+
+
+def cache_files(corpus_path, suffix):
+    return sorted(glob.glob(os.path.join(os.path.dirname(corpus_path), ".index_cache", f"*{suffix}")))
+
+
+def test_configs_do_not_evict_each_other(corpus_path, hashing):
+    for config in CONFIGS:
+        VectorStore(corpus_path, embedding=hashing, index_config=config, persist_index=True)
+    saved = {path: os.stat(path).st_mtime_ns for path in cache_files(corpus_path, ".faiss")}
+    assert len(saved) == len(CONFIGS)
+
+    # A second start loads every entry instead of rebuilding (and rewriting) it
+    for config in CONFIGS:
+        VectorStore(corpus_path, embedding=hashing, index_config=config, persist_index=True)
+    assert {path: os.stat(path).st_mtime_ns for path in cache_files(corpus_path, ".faiss")} == saved
+
+
+def test_corpus_change_prunes_only_that_config(corpus_path, hashing):
+    old = {}
+    for config in CONFIGS[:2]:
+        old[config.build_key()] = VectorStore(
+            corpus_path, embedding=hashing, index_config=config, persist_index=True
+        ).snapshot_id
+    locks = cache_files(corpus_path, ".lock")
+
+    with open(corpus_path, "w") as f:
+        json.dump(CORPUS[:-1], f)
+    new = VectorStore(corpus_path, embedding=hashing, index_config=CONFIGS[0], persist_index=True)
+
+    names = " ".join(cache_files(corpus_path, ".faiss"))
+    assert new.snapshot_id in names
+    assert old[CONFIGS[0].build_key()] not in names  # superseded version of the same config
+    assert old[CONFIGS[1].build_key()] in names  # other config untouched
+    assert set(locks) <= set(cache_files(corpus_path, ".lock"))
+
+
+def test_only_binary_indexes_persist_embeddings(corpus_path, hashing):
+    flat = VectorStore(corpus_path, embedding=hashing, persist_index=True)
+    assert cache_files(corpus_path, ".faiss") and not cache_files(corpus_path, ".npy")
+    assert VectorStore(corpus_path, embedding=hashing, persist_index=True).search("bond ETF") == flat.search("bond ETF")
+
+    binary = IndexConfig(storage="binary")
+    VectorStore(corpus_path, embedding=hashing, index_config=binary, persist_index=True)
+    assert len(cache_files(corpus_path, ".npy")) == 1
+    reloaded = VectorStore(corpus_path, embedding=hashing, index_config=binary, persist_index=True)
+    assert reloaded.get_vectors([0]).shape == (1, hashing.dimension)
+
+
+@pytest.mark.parametrize("config", [IndexConfig(), IndexConfig(storage="binary")], ids=lambda c: c.build_key())
+def test_shared_index_is_copied_on_first_write(corpus_path, hashing, config):
+    writer = VectorStore(corpus_path, embedding=hashing, index_config=config, shared_index=True)
+    reader = VectorStore(corpus_path, embedding=hashing, index_config=config, shared_index=True)
+    assert writer._index_mapped and reader._index_mapped
+    [index_file] = cache_files(corpus_path, ".faiss")
+    with open(index_file, "rb") as f:
+        on_disk = f.read()
+
+    new_doc = {"name": "GLD", "type": "Commodity", "risk_level": "high",
+               "description": "Physical gold bullion trust for commodity exposure."}
+    [doc_id] = writer.add_documents([new_doc])
+    assert not writer._index_mapped and reader._index_mapped
+    assert writer.search("gold bullion commodity", top_k=1)[0]["name"] == "GLD"
+    assert writer.index.ntotal == len(CORPUS) + 1
+
+    # The other process-wide user of the mapped file still sees the original corpus
+    assert reader.index.ntotal == len(CORPUS)
+    assert "GLD" not in {r["name"] for r in reader.search("gold bullion commodity", top_k=5)}
+    assert writer.remove_documents([doc_id, 0]) == 2 and reader.index.ntotal == len(CORPUS)
+    with open(index_file, "rb") as f:
+        assert f.read() == on_disk
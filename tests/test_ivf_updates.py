@@ -0,0 +1,38 @@
+# tests/test_ivf_updates.py
+
+import pytest
+from benchmarks.synthetic_corpus import write_corpus
+from services.index_factory import IndexConfig
+from services.vector_store import VectorStore
+
+SIZE = 2000
+NLIST = 16  # exhaustive probing below, so IVF must agree with exact search
+
+
+@pytest.fixture(scope="module")
+def large_corpus(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("ivf") / "corpus.jsonl")
+    write_corpus(path, SIZE, seed=7)
+    return path
+
+
+@pytest.mark.parametrize("kind", ["ivf_flat", "ivf_pq"])
+def test_ivf_ids_survive_remove_and_update(large_corpus, hashing, kind):
+    ivf = VectorStore(
+        large_corpus, embedding=hashing, index_config=IndexConfig(kind=kind, nlist=NLIST, nprobe=NLIST, pq_m=8)
+    )
+    flat = VectorStore(large_corpus, embedding=hashing)
+    assert "IVF" in type(ivf.index).__name__  # not the small-corpus flat fallback
+
+    removed = list(range(0, SIZE, 3))
+    for store in (ivf, flat):
+        assert store.remove_documents(removed) == len(removed)
+        store.update_document(1, dict(store.documents[1], description="Zebra-themed safari fund."))
+
+    by_name = {doc["name"]: doc for doc in flat.documents.values()}
+    for doc_id in (4, 1100, 1999, 1):
+        query = flat.documents[doc_id]["description"]
+        got = [r["name"] for r in ivf.search(query, top_k=5)]
+        assert all(int(name[3:]) % 3 for name in got)  # no removed document comes back
+        # IDs map back to the right documents: an exact-text match is retrieved
+        assert any(by_name[name]["description"] == query for name in got)
@@ -0,0 +1,107 @@
+# tests/test_llm_cache.py
+
+import asyncio
+import pytest
+from services.embedding_backends import HashingEmbedder
+from services.llm_cache import CachedLLMClient, response_cache_key
+from services.llm_policy import LLMServerError
+
+
+class GatedLLM:
+    """
+    Async fake LLM: counts calls and holds every reply until `release` is set.
+    """
+    model = "fake-model"
+    temperature = 0.3
+
+    def __init__(self, fail: bool = False):
+        self.calls = []
+        self.fail = fail
+        self.release = asyncio.Event()
+
+    async def achat(self, prompt, system_prompt=None):
+        self.calls.append(prompt)
+        await self.release.wait()
+        if self.fail:
+            raise LLMServerError("boom", 502)
+        return f"answer {len(self.calls)} to {prompt}"
+
+    def chat(self, prompt, system_prompt=None):
+        self.calls.append(prompt)
+        return f"answer {len(self.calls)} to {prompt}"
+
+
+def test_concurrent_misses_share_one_call():
+    async def run():
+        llm = GatedLLM()
+        cached = CachedLLMClient(llm)
+        callers = [asyncio.create_task(cached.achat("hello")) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        llm.release.set()
+        assert await asyncio.gather(*callers) == ["answer 1 to hello"] * 5
+        assert llm.calls == ["hello"] and not cached._inflight
+        assert await cached.achat("hello") == "answer 1 to hello"  # now an exact hit
+        assert len(llm.calls) == 1
+
+    asyncio.run(run())
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_call():
+    async def run():
+        llm = GatedLLM()
+        cached = CachedLLMClient(llm)
+        owner = asyncio.create_task(cached.achat("hello"))  # starts the call
+        await asyncio.sleep(0.05)
+        waiter = asyncio.create_task(cached.achat("hello"))
+        await asyncio.sleep(0)
+        owner.cancel()  # e.g. the first client disconnected
+        await asyncio.sleep(0)
+        llm.release.set()
+        assert await waiter == "answer 1 to hello"
+        with pytest.raises(asyncio.CancelledError):
+            await owner
+        assert llm.calls == ["hello"]
+
+    asyncio.run(run())
+
+
+def test_failed_call_reaches_every_waiter_and_is_not_cached():
+    async def run():
+        llm = GatedLLM(fail=True)
+        cached = CachedLLMClient(llm)
+        callers = [asyncio.create_task(cached.achat("hello")) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        llm.release.set()
+        results = await asyncio.gather(*callers, return_exceptions=True)
+        assert all(isinstance(r, LLMServerError) for r in results)
+        key = response_cache_key(cached.model, None, "hello", cached.temperature)
+        assert cached.exact.get(key) is None and not cached._inflight
+
+    asyncio.run(run())
+
+
+def test_sqlite_tier_survives_restarts(tmp_path):
+    path = str(tmp_path / "llm_cache.sqlite")
+    llm = GatedLLM()
+    first = CachedLLMClient(llm, sqlite_path=path)
+    assert first.chat("hello", system_prompt="sys") == "answer 1 to hello"
+    asyncio.run(first.aclose())
+
+    second = CachedLLMClient(llm, sqlite_path=path)  # a restarted (or another) worker
+    assert second.chat("hello", system_prompt="sys") == "answer 1 to hello"
+    assert second.persistent_hits == 1 and len(llm.calls) == 1
+    assert second.chat("hello", system_prompt="other") == "answer 2 to hello"
+    asyncio.run(second.aclose())
+
+
+def test_semantic_tier_reuses_close_prompts_in_the_same_scope():
+    llm = GatedLLM()
+    cached = CachedLLMClient(llm, semantic_model=HashingEmbedder(), semantic_threshold=0.99)
+    assert cached.chat("Suggest low risk bond ETFs.") == "answer 1 to Suggest low risk bond ETFs."
+    # Same tokens (the hashing embedder ignores case and punctuation): similarity 1.0
+    assert cached.chat("suggest LOW risk bond ETFs!") == "answer 1 to Suggest low risk bond ETFs."
+    assert cached.semantic_hits == 1
+    assert cached.chat("Suggest high growth tech stocks.") == "answer 2 to Suggest high growth tech stocks."
+    # Other system prompt: other scope, no semantic match
+    assert cached.chat("Suggest low risk bond ETFs.", system_prompt="sys").startswith("answer 3")
+    assert cached.stats()["semantic"] == {"hits": 1, "size": 3}
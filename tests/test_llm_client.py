@@ -0,0 +1,65 @@
+# tests/test_llm_client.py
+
+import asyncio
+import json
+from types import SimpleNamespace
+import pytest
+from agents.advisor_agent import AdvisorAgent
+from models.message import Message
+from services.llm_client import AsyncLLMClient, DummyLLM
+
+
+def completion(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def test_async_client_caps_requests_in_flight(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+
+    async def run():
+        client = AsyncLLMClient(max_concurrency=2)
+        in_flight, peak = 0, 0
+
+        async def create(**kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return completion(f" reply to {kwargs['messages'][-1]['content']} ")
+
+        client.client.chat.completions.create = create
+        replies = await asyncio.gather(*(client.achat(f"q{i}") for i in range(6)))
+        assert replies == [f"reply to q{i}" for i in range(6)]
+        assert peak == 2
+        await client.aclose()
+
+    asyncio.run(run())
+
+
+def test_async_client_has_no_blocking_chat(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    client = AsyncLLMClient()
+    with pytest.raises(TypeError, match="achat"):
+        client.chat("hello")
+    asyncio.run(client.aclose())
+
+
+def test_advisor_ahandle_awaits_the_llm():
+    class PlanningLLM(DummyLLM):
+        async def achat(self, prompt, system_prompt=None):
+            await asyncio.sleep(0)
+            return json.dumps({"tasks_for_analyst": ["Find bond ETFs", "Find TIPS"], "recommendation": "pending"})
+
+    advisor = AdvisorAgent(PlanningLLM())
+    profile = {"risk": "low", "goal": "income"}
+    message = Message(sender="client", receiver="advisor", content="I want income.",
+                      metadata={"client_profile": profile})
+    [to_analyst] = asyncio.run(advisor.ahandle(message))
+    assert to_analyst.receiver == "analyst"
+    assert to_analyst.content == "Find bond ETFs; Find TIPS"
+    assert to_analyst.metadata["client_profile"] == profile
+
+    # DummyLLM output is not JSON: the advisor falls back instead of failing
+    [fallback] = asyncio.run(AdvisorAgent(DummyLLM()).ahandle(message))
+    assert fallback.content == "Find moderate risk ETFs"
@@ -0,0 +1,93 @@
+# tests/test_llm_policy.py
+
+import time
+import httpx
+import openai
+import pytest
+from services.llm_policy import (
+    CircuitBreaker,
+    CircuitOpenError,
+    LLMPolicy,
+    LLMRateLimitError,
+    LLMRequestError,
+    LLMServerError,
+    LLMTimeoutError,
+    classify_error,
+)
+
+_REQUEST = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+
+
+def status_error(cls, code, headers=None):
+    return cls("boom", response=httpx.Response(code, request=_REQUEST, headers=headers or {}), body=None)
+
+
+def test_breaker_opens_fast_fails_and_recovers():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_time=0.05)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    time.sleep(0.06)
+    assert breaker.state == "half-open"
+    breaker.before_call()  # the single probe
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+
+def test_failed_probe_reopens_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_time=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_errors_are_classified():
+    assert isinstance(classify_error(openai.APITimeoutError(request=_REQUEST)), LLMTimeoutError)
+    limited = classify_error(status_error(openai.RateLimitError, 429, {"retry-after": "2"}))
+    assert isinstance(limited, LLMRateLimitError) and limited.retryable and limited.retry_after == 2.0
+    assert isinstance(classify_error(status_error(openai.InternalServerError, 503)), LLMServerError)
+    bad = classify_error(status_error(openai.BadRequestError, 400))
+    assert isinstance(bad, LLMRequestError) and not bad.retryable
+
+
+def test_backoff_is_bounded():
+    policy = LLMPolicy(backoff_base=0.5, backoff_max=2.0)
+    error = LLMServerError("boom", 500)
+    assert all(0.0 <= policy.backoff(attempt, error) <= 2.0 for attempt in range(10))
+    assert policy.backoff(0, LLMRateLimitError("slow down", 429, retry_after=30.0)) == 2.0
+
+
+def test_client_retries_then_trips_breaker(monkeypatch):
+    import asyncio
+    from services.llm_client import AsyncLLMClient
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    policy = LLMPolicy(max_retries=2, backoff_base=0.001, failure_threshold=3, recovery_time=60)
+    client = AsyncLLMClient(policy=policy)
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs["timeout"])
+        raise status_error(openai.InternalServerError, 502)
+
+    client.client.chat.completions.create = create
+
+    async def run():
+        with pytest.raises(LLMServerError):
+            await client.achat("hello")
+        assert len(calls) == 3 and all(t <= policy.timeout for t in calls)
+        with pytest.raises(CircuitOpenError):
+            await client.achat("hello")
+        assert len(calls) == 3
+        await client.aclose()
+
+    asyncio.run(run())
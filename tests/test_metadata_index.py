@@ -0,0 +1,46 @@
+# tests/test_metadata_index.py
+
+from services.metadata_index import MetadataIndex
+from tests.conftest import CORPUS
+
+
+def make_index():
+    index = MetadataIndex()
+    for doc_id, doc in enumerate(CORPUS):
+        index.add(doc_id, doc)
+    return index
+
+
+def test_resolve_filters():
+    index = make_index()
+    assert index.resolve({"risk_level": "low"}).tolist() == [1, 4]
+    assert index.resolve({"risk_level": {"Low", "moderate"}, "type": "etf"}).tolist() == [0, 3]
+    assert index.resolve({"risk_level": "speculative"}).tolist() == []
+
+
+def test_selector_is_cached_until_the_index_changes():
+    index = make_index()
+    selector = index.selector({"type": "Bond"})
+    assert index.selector({"type": "bond"}) is selector
+    assert [selector.is_member(i) for i in range(6)] == [False, True, False, False, True, False]
+
+    index.add(5, {"name": "BND", "type": "Bond", "risk_level": "low"})
+    refreshed = index.selector({"type": "Bond"})
+    assert refreshed is not selector
+    assert refreshed.is_member(5)
+
+
+def test_match_names():
+    index = make_index()
+    assert index.match_names("VTI") == [0]
+    assert index.match_names("tip, agg ") == [4, 1]
+    assert index.match_names("VTI bond") is None
+    assert index.match_names("VTI, AGG", allowed=index.resolve({"type": "Bond"})) == [1]
+
+
+def test_removed_documents_match_nothing():
+    index = make_index()
+    index.remove(1)
+    assert index.resolve({"risk_level": "low"}).tolist() == [4]
+    assert index.match_names("AGG") is None
+    assert not index.selector({"type": "bond"}).is_member(1)
@@ -0,0 +1,42 @@
+# tests/test_parallel_encode.py
+
+import threading
+import numpy as np
+from services.embedding_backends import EmbeddingConfig, load_embedding_model
+from services.parallel_encode import ParallelEncoder
+from services.vector_store import VectorStore
+
+
+def test_parallel_encode_matches_single_process(hashing):
+    texts = [f"bond fund number {i} for income" for i in range(50)]
+    with ParallelEncoder(hashing, workers=2, capacity=16) as encoder:
+        assert encoder.dimension == hashing.dimension
+        vectors = encoder.encode(texts)
+    assert np.array_equal(vectors, load_embedding_model(hashing).encode(texts))
+
+
+def test_parallel_build_matches_single_process_build(corpus_path, hashing):
+    serial = VectorStore(corpus_path, embedding=hashing)
+    parallel = VectorStore(corpus_path, embedding=hashing, build_workers=2)
+    assert not parallel.model_loaded  # the dimension came from a worker
+    query = "bond ETF for conservative investors"
+    assert parallel.search(query, top_k=5) == serial.search(query, top_k=5)
+
+
+def test_worker_model_load_failure_is_raised():
+    # No such model (and possibly no sentence_transformers): the first task fails.
+    embedding = EmbeddingConfig(backend="torch", model_name="/nonexistent/model")
+    errors = []
+
+    def enter():
+        try:
+            with ParallelEncoder(embedding, workers=2):
+                pass
+        except Exception as exc:
+            errors.append(exc)
+
+    thread = threading.Thread(target=enter, daemon=True)
+    thread.start()
+    thread.join(timeout=60)
+    assert not thread.is_alive(), "encoder pool hung on a failing worker"
+    assert errors
@@ -0,0 +1,50 @@
+# tests/test_profile_grid.py
+
+import gc
+import weakref
+import pytest
+from agents.analyst_agent import AnalystAgent
+from services.reranker import RERANK_CANDIDATES
+from services.store_registry import VectorStoreRegistry
+from services.vector_store import VectorStore
+
+
+def test_profile_table_does_not_keep_its_store_alive(corpus_path, hashing):
+    refs = []
+    for _ in range(3):
+        store = VectorStore(corpus_path, embedding=hashing, lexical=True)
+        agent = AnalystAgent(vector_store=store)
+        assert agent.profile_results.get("low", "income") is not None
+        refs.append(weakref.ref(store))
+        del store, agent
+    gc.collect()
+    assert all(ref() is None for ref in refs)
+
+
+def test_profile_table_matches_live_search(corpus_path, hashing):
+    store = VectorStore(corpus_path, embedding=hashing, lexical=True)
+    table = AnalystAgent(vector_store=store).profile_results
+    live = store.search(
+        "low risk investment options for income",
+        top_k=table.top_k,
+        filters={"risk_level": "low"},
+        min_score=table.min_score,
+        hybrid=table.hybrid,
+        mmr_lambda=table.mmr_lambda,
+    )
+    assert table.get("Low", "Income") == live
+
+
+@pytest.mark.parametrize("reranker_model", [None, "local-cross-encoder"])
+def test_registry_prebuilds_the_table_the_analyst_uses(corpus_path, hashing, reranker_model):
+    registry = VectorStoreRegistry(persist_index=False, embedding=hashing, reranker_model=reranker_model)
+    store = registry.warm_up(corpus_path)
+    reranker = registry.get_reranker() if reranker_model else None
+    agent = AnalystAgent(vector_store=store, reranker=reranker)
+    assert len(agent.profile_results) > 0  # built during warm-up, not on the first request
+    if reranker_model:
+        assert reranker.model_name == reranker_model
+        assert (agent.retrieval_depth, agent.retrieval_mmr) == (RERANK_CANDIDATES, None)
+    else:
+        assert (agent.retrieval_depth, agent.retrieval_mmr) == (AnalystAgent.TOP_K, AnalystAgent.MMR_LAMBDA)
+    registry.clear()
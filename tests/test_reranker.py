@@ -0,0 +1,45 @@
+# tests/test_reranker.py
+
+from services.reranker import CrossEncoderReranker, document_text
+from tests.conftest import CORPUS
+
+
+class CountingCrossEncoder:
+    """
+    Scores a pair by how many query words appear in the passage; records calls.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.calls.append(list(pairs))
+        return [sum(word in text.lower() for word in query.lower().split()) for query, text in pairs]
+
+
+def test_rerank_orders_by_cross_encoder_score():
+    reranker = CrossEncoderReranker(model=CountingCrossEncoder())
+    ranked = reranker.rerank("treasury inflation bond", CORPUS, top_k=2)
+    assert [r["name"] for r in ranked] == ["TIP", "AGG"]
+    assert ranked[0]["rerank_score"] == 2.0
+
+
+def test_scores_are_cached_per_query_and_document():
+    model = CountingCrossEncoder()
+    reranker = CrossEncoderReranker(model=model)
+    first = reranker.rerank("bond etf", CORPUS[:3])
+    assert len(model.calls) == 1 and len(model.calls[0]) == 3
+
+    # Same pairs again: served from the cache, no model call
+    assert reranker.rerank("bond etf", CORPUS[:3]) == first
+    assert len(model.calls) == 1
+
+    # A batch scores only the pairs it has not seen, in one call
+    reranker.rerank_batch(["bond etf", "growth"], [CORPUS, CORPUS[:2]])
+    assert len(model.calls) == 2
+    assert sorted(model.calls[1]) == sorted(
+        [("bond etf", document_text(doc)) for doc in CORPUS[3:]]
+        + [("growth", document_text(doc)) for doc in CORPUS[:2]]
+    )
+    stats = reranker.cache_stats()
+    assert stats["hits"] == 3 + 3 and stats["misses"] == 3 + 4
@@ -0,0 +1,12 @@
+# tests/test_retrieval_benchmark.py
+
+from benchmarks.retrieval_benchmark import index_configs
+
+
+def test_binary_storage_yields_one_config_per_size():
+    configs = index_configs(["flat", "ivf_flat", "hnsw"], ["float32", "binary"], 10_000, nprobe=[4, 16])
+    binary = [c for c in configs if c.is_binary]
+    assert len(binary) == 1
+    # flat, ivf_flat at two nprobe values, hnsw, and binary
+    assert len(configs) == 5
+    assert len({c.build_key() for c in configs}) == 4
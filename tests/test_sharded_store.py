@@ -0,0 +1,43 @@
+# tests/test_sharded_store.py
+
+import json
+import os
+import pytest
+from services.embedding_backends import EmbeddingConfig, HashingEmbedder
+from services.sharded_store import ShardedVectorStore, partition_corpus
+from tests.conftest import CORPUS
+
+
+def test_in_process_shards_merge_global_top_k(corpus_path, hashing):
+    store = ShardedVectorStore(corpus_path, num_shards=2, embedding=hashing)
+    results = store.search("bond investors", top_k=5, filters={"risk_level": "low"})
+    assert {r["name"] for r in results} == {"AGG", "TIP"}
+    store.close()
+
+
+def test_shard_process_failure_is_raised(corpus_path):
+    # The parent gets a working model, but the shard processes cannot load torch.
+    with pytest.raises(RuntimeError, match="exited with code"):
+        ShardedVectorStore(
+            corpus_path,
+            num_shards=2,
+            processes=True,
+            model=HashingEmbedder(),
+            embedding=EmbeddingConfig(backend="torch", model_name="no-such-model"),
+        )
+
+
+def test_repartition_replaces_shard_files_atomically(corpus_path, tmp_path):
+    paths = partition_corpus(corpus_path, 2)
+    before = [open(path).read() for path in paths]
+    with open(paths[0]) as reader:  # a live reader keeps the file it opened
+        (tmp_path / "corpus.json").write_text('[{"name": "VTI"}, not json')
+        with pytest.raises(ValueError):
+            partition_corpus(corpus_path, 2)
+        assert [open(path).read() for path in paths] == before
+        assert sorted(os.listdir(os.path.dirname(paths[0]))) == sorted(os.path.basename(p) for p in paths)
+
+        (tmp_path / "corpus.json").write_text(json.dumps(CORPUS[:2]))
+        assert partition_corpus(corpus_path, 2) == paths
+        assert reader.read() == before[0]
+    assert sum(len(open(path).readlines()) for path in paths) == 2
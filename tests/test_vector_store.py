@@ -0,0 +1,119 @@
+# tests/test_vector_store.py
+
+import threading
+import numpy as np
+import pytest
+from services import vector_store
+from services.index_factory import IndexConfig
+from services.vector_store import VectorStore, maximal_marginal_relevance
+
+INDEX_CONFIGS = [
+    IndexConfig(),
+    IndexConfig(kind="hnsw"),
+    IndexConfig(storage="sq8"),
+    IndexConfig(storage="binary"),
+]
+
+
+@pytest.fixture(params=INDEX_CONFIGS, ids=lambda c: c.build_key())
+def store(request, corpus_path, hashing):
+    return VectorStore(corpus_path, embedding=hashing, index_config=request.param)
+
+
+def names(results):
+    return [r["name"] for r in results]
+
+
+def test_search_with_filters(store):
+    results = store.search("bond investors", top_k=5, filters={"risk_level": "low"})
+    assert set(names(results)) == {"AGG", "TIP"}
+    results = store.search("ETF", top_k=5, filters={"risk_level": {"low", "moderate"}, "type": "ETF"})
+    assert set(names(results)) == {"VTI", "ESGU"}
+    assert store.search("ETF", filters={"risk_level": "speculative"}) == []
+
+
+def test_add_document(store):
+    [doc_id] = store.add_documents([{
+        "name": "GLD", "type": "Commodity", "risk_level": "high",
+        "description": "Gold bullion trust hedging against inflation and currency risk.",
+    }])
+    assert store.documents[doc_id]["name"] == "GLD"
+    results = store.search("gold bullion inflation hedge", top_k=1, filters={"type": "commodity"})
+    assert names(results) == ["GLD"]
+
+
+def test_update_document_moves_it_between_filters(store):
+    doc_id = next(i for i, d in store.documents.items() if d["name"] == "QQQ")
+    before = store.version
+    store.update_document(doc_id, {
+        "name": "QQQ", "type": "ETF", "risk_level": "low",
+        "description": "Short-term treasury bill ETF for parking cash.",
+    })
+    assert store.version > before
+    assert "QQQ" not in names(store.search("ETF", top_k=5, filters={"risk_level": "high"}))
+    assert "QQQ" in names(store.search("treasury bill parking cash", top_k=5, filters={"risk_level": "low"}))
+
+
+def test_remove_documents(store):
+    doc_id = next(i for i, d in store.documents.items() if d["name"] == "AGG")
+    assert store.remove_documents([doc_id, 12345]) == 1
+    assert store.remove_documents([doc_id]) == 0
+    results = store.search("aggregate bond conservative", top_k=5, filters={"risk_level": "low"})
+    assert names(results) == ["TIP"]
+
+
+def test_update_unknown_document_raises(store):
+    with pytest.raises(KeyError):
+        store.update_document(999, {"name": "X", "description": "x"})
+
+
+def test_search_runs_while_hnsw_index_is_rebuilt(corpus_path, hashing, monkeypatch):
+    store = VectorStore(corpus_path, embedding=hashing, index_config=IndexConfig(kind="hnsw"))
+    rebuilding, release = threading.Event(), threading.Event()
+    build_index = vector_store.build_index
+
+    def slow_build_index(*args, **kwargs):
+        rebuilding.set()
+        release.wait(10)
+        return build_index(*args, **kwargs)
+
+    monkeypatch.setattr(vector_store, "build_index", slow_build_index)
+    doc_id = next(i for i, d in store.documents.items() if d["name"] == "TIP")
+    edit = threading.Thread(target=store.remove_documents, args=([doc_id],))
+    edit.start()
+    try:
+        assert rebuilding.wait(10)
+        searched = []
+        search = threading.Thread(target=lambda: searched.append(store.search("bond", top_k=5)))
+        search.start()
+        search.join(5)
+        assert searched and "TIP" in names(searched[0])  # served from the old graph, not blocked
+    finally:
+        release.set()
+        edit.join()
+    assert "TIP" not in names(store.search("treasury inflation", top_k=5))
+
+
+def test_mmr_skips_near_duplicates():
+    query = np.array([1.0, 0.0, 0.0], dtype="float32")
+    candidates = np.array([
+        [0.95, 0.31, 0.0],
+        [0.95, 0.31, 0.0],  # duplicate of the best hit
+        [0.8, 0.0, 0.6],
+    ], dtype="float32")
+    candidates /= np.linalg.norm(candidates, axis=1, keepdims=True)
+    assert maximal_marginal_relevance(query, candidates, top_k=2, mmr_lambda=1.0) == [0, 1]
+    assert maximal_marginal_relevance(query, candidates, top_k=2, mmr_lambda=0.5) == [0, 2]
+    assert maximal_marginal_relevance(query, candidates, top_k=5) == [0, 2, 1]
+    assert maximal_marginal_relevance(query, candidates[:0], top_k=2) == []
+
+
+def test_search_with_mmr_picks_from_the_candidates(corpus_path, hashing):
+    store = VectorStore(corpus_path, embedding=hashing)
+    query = "ETF for investors"
+    plain = store.search(query, top_k=5)
+    diverse = store.search(query, top_k=3, mmr_lambda=0.3)
+    assert len(diverse) == 3
+    assert diverse[0] == plain[0]  # the most relevant hit always comes first
+    assert {r["name"] for r in diverse} <= {r["name"] for r in plain}
+    assert store.search(query, top_k=3, mmr_lambda=1.0) == plain[:3]